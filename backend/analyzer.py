@@ -1,7 +1,18 @@
 import os
 import json
+import time
+import hashlib
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 import google.generativeai as genai
 from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from models import ContractAnalysis
+from retrieval import BM25Index
+from routing import CHARS_PER_TOKEN, MAX_CHUNKS, Route, choose_route, estimate_tokens
+from segmenter import split_clauses
 
 load_dotenv()
 
@@ -103,38 +114,197 @@ CONTRACT TEXT:
 Return only the JSON object. No other text."""
 
 
-def analyze_contract(contract_text: str) -> dict:
-    """
-    Send the contract text to Gemini and return the parsed JSON analysis.
-    Raises Exception on API error or JSON parse failure.
-    """
+DELTA_PROMPT_TEMPLATE = """Below is the JSON analysis of a contract, followed by the clauses of a new contract
+that are not in the analyzed one, and the clauses of the analyzed contract that the new one no longer has.
+Apart from these clauses the two contracts are identical.
+
+Update the analysis so it is correct for the new contract. Change only what the added and removed clauses affect
+(anything that relied on a removed clause no longer applies) and keep every other value exactly as it is.
+Return the complete JSON object in the same format.
+
+PREVIOUS ANALYSIS:
+---
+{previous_analysis}
+---
+
+ADDED OR CHANGED CLAUSES:
+---
+{changed_clauses}
+---
+
+REMOVED CLAUSES:
+---
+{removed_clauses}
+---
+
+Return only the JSON object. No other text."""
+
+
+QA_SYSTEM_PROMPT = """You are a senior business contract analyst answering follow-up questions about a contract.
+Answer strictly from the contract text provided — do not invent or assume information not present.
+Cite the clause numbers you relied on, e.g. [3]. If the contract does not answer the question, say so plainly.
+Answer in plain English, in at most two short paragraphs."""
+
+QA_PROMPT_TEMPLATE = """Answer the question below about the contract.
+
+MOST RELEVANT CLAUSES:
+---
+{clauses}
+---
+
+QUESTION: {question}"""
+
+# Answers are short prose, so they need a much smaller output budget than a full analysis
+QA_MAX_OUTPUT_TOKENS = 1024
+QA_ESTIMATED_OUTPUT_TOKENS = 250
+
+
+SECTION_PROMPT_TEMPLATE = """Analyze the following excerpts from a contract and return a JSON response in exactly this format:
+
+{schema}
+
+CONTRACT EXCERPTS (clause numbers refer to the full contract):
+---
+{contract_text}
+---
+
+Return only the JSON object. No other text."""
+
+RISK_LEVEL_SCHEMA = '"risk_level": "Low/Medium/High", "reason": "", "clause_reference": ""'
+
+# One entry per concurrent request in "sectioned" mode. Each asks only for its own keys of the
+# ContractAnalysis schema and sees only the clauses BM25 ranks highest for its query.
+ANALYSIS_SECTIONS = [
+    {
+        "name": "parties_duration",
+        "keys": ["plain_english_summary", "key_parties", "contract_duration"],
+        "query": "agreement entered into between parties effective date term commence expire expiry renewal renew automatically",
+        "include_opening_clauses": True,
+        "max_output_tokens": 1024,
+        "schema": """{
+  "plain_english_summary": "1 paragraph summary understandable by a non-lawyer",
+  "key_parties": {"party_1": "", "party_2": "", "other_parties": []},
+  "contract_duration": {"start_date": "", "end_date": "", "renewal_terms": "", "auto_renewal": "Yes/No/Not Found"}
+}""",
+    },
+    {
+        "name": "payment",
+        "keys": ["payment_terms"],
+        "query": "fees payment pay invoice price amount due late interest refund expenses",
+        "max_output_tokens": 512,
+        "schema": """{
+  "payment_terms": {"amounts": "", "payment_schedule": "", "late_fees": "", "refund_policy": ""}
+}""",
+    },
+    {
+        "name": "termination",
+        "keys": ["termination_clauses"],
+        "query": "terminate termination notice convenience cause breach cure insolvency exit transition",
+        "max_output_tokens": 512,
+        "schema": """{
+  "termination_clauses": {"termination_for_convenience": "", "termination_for_cause": "", "notice_period": "", "exit_conditions": ""}
+}""",
+    },
+    {
+        "name": "liability_ip_confidentiality",
+        "keys": ["confidentiality_terms", "intellectual_property_terms", "liability_and_indemnity"],
+        "query": "liability limitation cap damages indemnify indemnification confidential disclosure intellectual property license ownership",
+        "max_output_tokens": 1024,
+        "schema": """{
+  "confidentiality_terms": "",
+  "intellectual_property_terms": "",
+  "liability_and_indemnity": {"liability_cap": "", "indemnification_clause": ""}
+}""",
+    },
+    {
+        "name": "risk_flags",
+        "keys": ["risk_flags", "unusual_or_risky_clauses"],
+        "query": "renew automatically liability unlimited indemnify terminate penalty fee increase exclusive perpetual irrevocable sole discretion waive",
+        "max_output_tokens": 2048,
+        "schema": """{
+  "risk_flags": [
+    {"category": "Auto-Renewal Risk", %s},
+    {"category": "Liability Risk", %s},
+    {"category": "Exit Risk", %s},
+    {"category": "Payment Risk", %s},
+    {"category": "IP Risk", %s}
+  ],
+  "unusual_or_risky_clauses": [{"clause": "", "why_it_is_risky": ""}]
+}""" % ((RISK_LEVEL_SCHEMA,) * 5),
+    },
+]
+
+# Clauses sent per section; the opening clauses (recitals, parties) go to the parties section
+SECTION_MAX_CLAUSES = 12
+OPENING_CLAUSES = 3
+
+
+CHUNK_NOTE = (
+    "\n\n[NOTE: This is part {part} of {total} of a longer contract. Analyze only this part "
+    "and use \"Not specified\" for anything it does not cover.]"
+)
+
+# Upper bound on concurrent model calls when a contract is analyzed in chunks
+MAX_PARALLEL_CALLS = 4
+
+RISK_ORDER = {"high": 0, "medium": 1, "low": 2}
+UNSPECIFIED_VALUES = ("", "not specified", "not found", "n/a")
+
+
+# The template has a single placeholder, so split it once instead of re-parsing it with
+# str.format on every request; building a prompt is then a plain concatenation.
+_ANALYSIS_PROMPT_PREFIX, _ANALYSIS_PROMPT_SUFFIX = ANALYSIS_PROMPT_TEMPLATE.format(
+    contract_text="\x00"
+).split("\x00")
+
+
+def build_analysis_prompt(contract_text: str) -> str:
+    # join sizes the result once; chained + would copy the 80 KB contract twice
+    return "".join((_ANALYSIS_PROMPT_PREFIX, contract_text, _ANALYSIS_PROMPT_SUFFIX))
+
+
+def _configure_api_key() -> None:
     # Read at call-time so .env changes don't require a server restart
     api_key = os.getenv("GEMINI_API_KEY", "")
-    model_name = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
-
     if not api_key:
         raise ValueError(
             "GEMINI_API_KEY is not set. "
             "Get a free key at https://aistudio.google.com/app/apikey "
             "and add it to backend/.env"
         )
+    genai.configure(api_key=api_key)
 
-    # Cap contract text to ~80,000 characters to stay within token limits
-    MAX_CHARS = 80_000
-    if len(contract_text) > MAX_CHARS:
-        contract_text = contract_text[:MAX_CHARS] + "\n\n[NOTE: Contract was truncated to fit token limits.]"
 
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel(
-        model_name=model_name,
-        system_instruction=SYSTEM_PROMPT,
-        generation_config=genai.GenerationConfig(
-            max_output_tokens=4096,
-            temperature=0.1,   # Low temp for consistent structured output
-        )
+def _generate(
+    prompt: str,
+    model_name: Optional[str] = None,
+    max_output_tokens: int = 4096,
+    system_instruction: str = SYSTEM_PROMPT,
+    cached_content: Optional[str] = None,
+) -> Tuple[str, dict]:
+    """
+    Send a prompt to Gemini and return the raw JSON text it responds with,
+    along with the token counts reported by the API.
+    With cached_content, the prompt runs against a previously created context cache
+    (which already holds the system instruction and document).
+    Raises Exception on API error.
+    """
+    model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    _configure_api_key()
+
+    generation_config = genai.GenerationConfig(
+        max_output_tokens=max_output_tokens,
+        temperature=0.1,   # Low temp for consistent structured output
     )
+    if cached_content:
+        model = genai.GenerativeModel.from_cached_content(cached_content, generation_config=generation_config)
+    else:
+        model = genai.GenerativeModel(
+            model_name=model_name,
+            system_instruction=system_instruction,
+            generation_config=generation_config,
+        )
 
-    prompt = ANALYSIS_PROMPT_TEMPLATE.format(contract_text=contract_text)
     response = model.generate_content(prompt)
     raw_response = response.text.strip()
 
@@ -144,12 +314,351 @@ def analyze_contract(contract_text: str) -> dict:
         # Remove first and last lines (the ``` fences)
         raw_response = "\n".join(lines[1:-1]).strip()
 
+    usage_metadata = getattr(response, "usage_metadata", None)
+    usage = {
+        "input_tokens": getattr(usage_metadata, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage_metadata, "candidates_token_count", 0) or 0,
+        "cached_input_tokens": getattr(usage_metadata, "cached_content_token_count", 0) or 0,
+    }
+    return raw_response, usage
+
+
+def _generate_step(checkpoint, key: str, prompt: str, model_name: str, max_output_tokens: int) -> Tuple[str, dict]:
+    """
+    Run one model call of a larger analysis through an optional checkpoint (see journal.JobJournal).
+    A step the checkpoint already holds is returned without calling the model again;
+    a new result is saved as soon as it arrives, so a restart resumes after the last completed call.
+    """
+    # Tie the step to its exact prompt so a replay never reuses an answer to a different question
+    key = f"{key}:{hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:12]}"
+    if checkpoint is not None:
+        saved = checkpoint.get(key)
+        if saved is not None:
+            return saved
+    raw_response, usage = _generate(prompt, model_name, max_output_tokens)
+    if checkpoint is not None:
+        checkpoint.put(key, raw_response, usage)
+    return raw_response, usage
+
+
+def _invalid_json_error(raw_response: str, error: Exception) -> ValueError:
+    return ValueError(
+        f"Claude returned an invalid JSON response. Parse error: {str(error)}\n"
+        f"Raw response: {raw_response[:500]}"
+    )
+
+
+def parse_analysis(raw_response: str) -> ContractAnalysis:
+    """
+    Validate the model's raw JSON straight into a ContractAnalysis.
+    Skips the intermediate dict that json.loads + ContractAnalysis(**data) would build.
+    """
+    try:
+        return ContractAnalysis.model_validate_json(raw_response)
+    except ValidationError as e:
+        if any(err["type"] == "json_invalid" for err in e.errors()):
+            raise _invalid_json_error(raw_response, e)
+        raise
+
+
+def _parse_json(raw_response: str) -> dict:
     try:
-        analysis = json.loads(raw_response)
+        return json.loads(raw_response)
     except json.JSONDecodeError as e:
-        raise ValueError(
-            f"Claude returned an invalid JSON response. Parse error: {str(e)}\n"
-            f"Raw response: {raw_response[:500]}"
+        raise _invalid_json_error(raw_response, e)
+
+
+def _usage_report(
+    route: Route,
+    strategy: str,
+    prompts: List[str],
+    usages: List[dict],
+    started: float,
+    system_prompt: str = SYSTEM_PROMPT,
+    cached_tokens: int = 0,
+) -> dict:
+    """
+    Predicted vs. actual token usage and latency for one analysis.
+    system_prompt is the instruction sent with every prompt; cached_tokens the estimated size of
+    a context cache the calls ran against (which is billed as input too).
+    """
+    return {
+        "model": route.model_name,
+        "strategy": strategy,
+        "calls": len(prompts),
+        "max_output_tokens": route.max_output_tokens,
+        "predicted_input_tokens": (
+            sum(estimate_tokens(p) for p in prompts) + estimate_tokens(system_prompt) * len(prompts) + cached_tokens
+        ),
+        "predicted_output_tokens": route.estimated_output_tokens,
+        "actual_input_tokens": sum(u["input_tokens"] for u in usages),
+        "actual_output_tokens": sum(u["output_tokens"] for u in usages),
+        "cached_input_tokens": sum(u.get("cached_input_tokens", 0) for u in usages),
+        "latency_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+def _split_into_chunks(contract_text: str, chunk_tokens: int) -> List[str]:
+    """
+    Group consecutive clauses into chunks of roughly chunk_tokens each.
+    Anything beyond MAX_CHUNKS chunks is dropped with a truncation note.
+    """
+    max_chars = int(chunk_tokens * CHARS_PER_TOKEN)
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    for clause in split_clauses(contract_text):
+        # A single oversized clause (e.g. text with no structure) is hard-split
+        pieces = [clause[i:i + max_chars] for i in range(0, len(clause), max_chars)]
+        for piece in pieces:
+            if current and size + len(piece) > max_chars:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+
+    if len(chunks) > MAX_CHUNKS:
+        chunks = chunks[:MAX_CHUNKS]
+        chunks[-1] += "\n\n[NOTE: Contract was truncated to fit token limits.]"
+    return chunks
+
+
+def _is_unspecified(value) -> bool:
+    return isinstance(value, str) and value.strip().lower() in UNSPECIFIED_VALUES
+
+
+def _merge_values(first, second):
+    if isinstance(first, dict) and isinstance(second, dict):
+        merged = dict(first)
+        for key, value in second.items():
+            merged[key] = _merge_values(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(first, list) and isinstance(second, list):
+        return first + [item for item in second if item not in first]
+    # Keep the first concrete value found; later chunks only fill gaps
+    if _is_unspecified(first) and not _is_unspecified(second):
+        return second
+    return first
+
+
+def merge_analyses(parts: List[dict]) -> dict:
+    """
+    Combine partial analyses of consecutive chunks of one contract into a single analysis.
+    """
+    merged: dict = {}
+    for part in parts:
+        merged = _merge_values(merged, part)
+
+    summaries = [p.get("plain_english_summary", "") for p in parts]
+    merged["plain_english_summary"] = " ".join(s for s in summaries if not _is_unspecified(s))
+
+    # One flag per category, keeping the most severe assessment across chunks
+    flags_by_category: dict = {}
+    for flag in merged.get("risk_flags", []):
+        category = flag.get("category", "")
+        current = flags_by_category.get(category)
+        level = RISK_ORDER.get(str(flag.get("risk_level", "")).lower(), 3)
+        if current is None or level < RISK_ORDER.get(str(current.get("risk_level", "")).lower(), 3):
+            flags_by_category[category] = flag
+    merged["risk_flags"] = list(flags_by_category.values())
+
+    return merged
+
+
+def analyze_contract(contract_text: str, route: Optional[Route] = None, checkpoint=None) -> Tuple[ContractAnalysis, dict]:
+    """
+    Send the contract text to Gemini and return the validated analysis plus a usage report.
+    The model, output budget and chunking strategy come from the routing policy unless a route is given.
+    With a checkpoint, each completed chunk is saved and chunks saved by an earlier run are skipped.
+    Raises Exception on API error or JSON parse failure.
+    """
+    route = route or choose_route(contract_text)
+    started = time.perf_counter()
+
+    if route.strategy == "chunked":
+        chunks = _split_into_chunks(contract_text, route.chunk_tokens)
+        prompts = [
+            build_analysis_prompt(chunk + CHUNK_NOTE.format(part=i + 1, total=len(chunks)))
+            for i, chunk in enumerate(chunks)
+        ]
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_CALLS) as pool:
+            results = list(pool.map(
+                lambda i: _generate_step(
+                    checkpoint, f"chunk:{i + 1}/{len(prompts)}", prompts[i],
+                    route.model_name, route.max_output_tokens,
+                ),
+                range(len(prompts)),
+            ))
+        analysis = ContractAnalysis.model_validate(merge_analyses([_parse_json(r[0]) for r in results]))
+        usages = [r[1] for r in results]
+    else:
+        prompts = [build_analysis_prompt(contract_text)]
+        raw_response, usage = _generate_step(
+            checkpoint, "single", prompts[0], route.model_name, route.max_output_tokens
         )
+        analysis = parse_analysis(raw_response)
+        usages = [usage]
+
+    return analysis, _usage_report(route, route.strategy, prompts, usages, started)
+
 
-    return analysis
+def analyze_contract_delta(
+    previous_analysis: ContractAnalysis,
+    changed_clauses: List[str],
+    removed_clauses: Optional[List[str]] = None,
+    checkpoint=None,
+) -> Tuple[ContractAnalysis, dict]:
+    """
+    Update the analysis of a near-identical contract using only the clauses that differ:
+    those added or changed in the new contract and those it dropped.
+    Much cheaper than analyze_contract because the unchanged text is never re-sent.
+    """
+    changed_text = "\n\n".join(changed_clauses) or "(none)"
+    removed_text = "\n\n".join(removed_clauses or []) or "(none)"
+    route = choose_route(changed_text + "\n\n" + removed_text)
+    started = time.perf_counter()
+
+    prompt = DELTA_PROMPT_TEMPLATE.format(
+        previous_analysis=previous_analysis.model_dump_json(indent=2, exclude={"normalized"}),
+        changed_clauses=changed_text,
+        removed_clauses=removed_text,
+    )
+    # The full analysis is re-emitted, so budget output as for a whole contract
+    route.max_output_tokens = max(route.max_output_tokens, 4096)
+    raw_response, usage = _generate_step(checkpoint, "delta", prompt, route.model_name, route.max_output_tokens)
+    return parse_analysis(raw_response), _usage_report(route, "delta", [prompt], [usage], started)
+
+
+def _section_excerpt(section: dict, clauses: List[str], index: BM25Index, max_chars: int) -> str:
+    """
+    Pick the clauses relevant to one section, in document order, numbered as in the contract.
+    Clauses that share no terms with the section's query are left out, however short the contract.
+    At most max_chars of clause text are included; the most relevant clauses are kept first.
+    """
+    ranked = [i for i, _ in index.search(section["query"], top_k=SECTION_MAX_CLAUSES)]
+    if section.get("include_opening_clauses"):
+        ranked = list(range(min(OPENING_CLAUSES, len(clauses)))) + ranked
+
+    selected: dict = {}
+    used = 0
+    for i in ranked:
+        if i in selected:
+            continue
+        if used >= max_chars:
+            break
+        # A single clause can be arbitrarily long when the text has no structure
+        selected[i] = clauses[i][:max_chars - used]
+        used += len(selected[i])
+    return "\n\n".join(f"[{i + 1}] {selected[i]}" for i in sorted(selected))
+
+
+def analyze_contract_sectioned(
+    contract_text: str, route: Optional[Route] = None, checkpoint=None
+) -> Tuple[ContractAnalysis, dict]:
+    """
+    Analyze the contract with one smaller request per schema section, issued concurrently,
+    and assemble the results into a single ContractAnalysis.
+    Wall-clock time is bounded by the slowest section rather than by one long generation.
+    Each excerpt is capped at the route's chunk size, so no section is sent more than one chunk would be.
+    Falls back to analyze_contract when the excerpts together would be no smaller than the contract.
+    With a checkpoint, sections completed by an earlier run are not requested again.
+    """
+    route = route or choose_route(contract_text)
+    started = time.perf_counter()
+
+    clauses = split_clauses(contract_text)
+    index = BM25Index(clauses)
+    max_chars = int(route.chunk_tokens * CHARS_PER_TOKEN)
+    excerpts = [_section_excerpt(section, clauses, index, max_chars) for section in ANALYSIS_SECTIONS]
+    if sum(len(excerpt) for excerpt in excerpts) >= len(contract_text):
+        # Splitting would multiply the input rather than divide the work
+        return analyze_contract(contract_text, route, checkpoint)
+    prompts = [
+        SECTION_PROMPT_TEMPLATE.format(schema=section["schema"], contract_text=excerpt)
+        for section, excerpt in zip(ANALYSIS_SECTIONS, excerpts)
+    ]
+
+    def run_section(i: int) -> Tuple[str, dict]:
+        section = ANALYSIS_SECTIONS[i]
+        return _generate_step(
+            checkpoint, f"section:{section['name']}", prompts[i], route.model_name, section["max_output_tokens"]
+        )
+
+    with ThreadPoolExecutor(max_workers=len(ANALYSIS_SECTIONS)) as pool:
+        results = list(pool.map(run_section, range(len(ANALYSIS_SECTIONS))))
+
+    assembled: dict = {}
+    for section, (raw_response, _) in zip(ANALYSIS_SECTIONS, results):
+        data = _parse_json(raw_response)
+        # Keep only the keys this section owns, in case the model answered more than asked
+        assembled.update({key: data[key] for key in section["keys"] if key in data})
+
+    analysis = ContractAnalysis.model_validate(assembled)
+    return analysis, _usage_report(route, "sectioned", prompts, [r[1] for r in results], started)
+
+
+def create_context_cache(document_text: str, ttl_minutes: int) -> Optional[Tuple[str, float]]:
+    """
+    Upload the full contract as a model-side context cache so follow-up questions reuse it
+    at the cached-token rate. Returns (cache name, expiry epoch seconds), or None when caching
+    is unavailable for the configured model or the document is too small to be cached.
+    """
+    model_name = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    _configure_api_key()
+    try:
+        cache = genai.caching.CachedContent.create(
+            model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+            system_instruction=QA_SYSTEM_PROMPT,
+            contents=[document_text],
+            ttl=datetime.timedelta(minutes=ttl_minutes),
+        )
+    except Exception:
+        # Not every model/tier supports caching; fall back to sending retrieved clauses only
+        return None
+    return cache.name, cache.expire_time.timestamp()
+
+
+def answer_question(
+    question: str,
+    clauses: List[Tuple[int, str]],
+    cached_content: Optional[str] = None,
+    cached_document_tokens: int = 0,
+) -> Tuple[str, dict]:
+    """
+    Answer a follow-up question from the retrieved (clause number, text) pairs.
+    When a context cache of the whole document is given, the retrieved clauses point the model
+    at the relevant text while the cache covers anything retrieval missed.
+    cached_document_tokens is the estimated size of that document, for the usage report.
+    """
+    started = time.perf_counter()
+    clause_text = "\n\n".join(f"[{number}] {text}" for number, text in clauses)
+    prompt = QA_PROMPT_TEMPLATE.format(clauses=clause_text, question=question)
+    if cached_content:
+        # The system instruction and the whole document are served from the cache
+        system_prompt, cached_tokens = "", estimate_tokens(QA_SYSTEM_PROMPT) + cached_document_tokens
+    else:
+        system_prompt, cached_tokens = QA_SYSTEM_PROMPT, 0
+
+    route = Route(
+        model_name=os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
+        max_output_tokens=QA_MAX_OUTPUT_TOKENS,
+        strategy="qa",
+        chunk_tokens=0,
+        estimated_input_tokens=estimate_tokens(prompt) + estimate_tokens(system_prompt) + cached_tokens,
+        estimated_output_tokens=QA_ESTIMATED_OUTPUT_TOKENS,
+        clause_count=len(clauses),
+    )
+    answer, usage = _generate(
+        prompt,
+        route.model_name,
+        route.max_output_tokens,
+        system_instruction=QA_SYSTEM_PROMPT,
+        cached_content=cached_content,
+    )
+    strategy = "qa-cached" if cached_content else "qa"
+    return answer, _usage_report(
+        route, strategy, [prompt], [usage], started, system_prompt=system_prompt, cached_tokens=cached_tokens
+    )
@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from models import ContractAnalysis
+from retrieval import BM25Index
+from segmenter import split_clauses
+
+
+@dataclass
+class StoredDocument:
+    document_id: str
+    text: str
+    clauses: List[str]
+    analysis: Optional[ContractAnalysis] = None
+    # Built on the first follow-up question, then reused
+    index: Optional[BM25Index] = None
+    # Name and expiry (epoch seconds) of the model-side context cache, if one was created
+    cache_name: Optional[str] = None
+    cache_expires_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    # Separate from `lock`, which guards the index: cache creation is a slow network call
+    cache_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def get_index(self) -> BM25Index:
+        with self.lock:
+            if self.index is None:
+                self.index = BM25Index(self.clauses)
+            return self.index
+
+
+class DocumentStore:
+    """
+    Keeps the segmented text and analysis of recently analyzed contracts so follow-up questions
+    do not need the contract to be re-sent. Least recently used documents are evicted first.
+    """
+
+    def __init__(self, max_documents: int = 500):
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[str, StoredDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, document_id: str, text: str, analysis: Optional[ContractAnalysis] = None) -> StoredDocument:
+        document = StoredDocument(
+            document_id=document_id, text=text, clauses=split_clauses(text), analysis=analysis
+        )
+        with self._lock:
+            self._documents[document_id] = document
+            self._documents.move_to_end(document_id)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return document
+
+    def get(self, document_id: str) -> Optional[StoredDocument]:
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is not None:
+                self._documents.move_to_end(document_id)
+            return document
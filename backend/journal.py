@@ -0,0 +1,294 @@
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Where job journals live. Override with JOURNAL_DIR (e.g. a volume that survives redeploys).
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".journal")
+
+# Job ids are truncated SHA-256 hex digests; anything else never touches the filesystem
+_JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+# Expired journals are swept at most this often, on the next new request
+CLEANUP_INTERVAL_SECONDS = 600
+
+
+def _append(path: str, record: dict) -> None:
+    """Append one record and fsync, so it survives a crash as soon as this returns."""
+    line = json.dumps(record, separators=(",", ":")) + "\n"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class JobJournal:
+    """
+    Write-ahead journal of one analysis request.
+    Records the options, the extracted text and each completed model call, so a restarted
+    worker can pick the job up from its last completed step. Doubles as the analyzer's
+    checkpoint: get()/put() look up and save model responses by step key.
+    """
+
+    def __init__(self, job_id: str, directory: str):
+        self.job_id = job_id
+        self.path = os.path.join(directory, f"{job_id}.jsonl")
+        self.upload_path = os.path.join(directory, f"{job_id}.pdf")
+        self.options: dict = {}
+        self.source = ""
+        self.text: Optional[str] = None
+        self.steps: Dict[str, Tuple[str, dict]] = {}
+        self.result: Optional[str] = None
+        # False for results produced by crash recovery until a client has received them
+        self.delivered = False
+        self.error: Optional[str] = None
+        self.updated_at = 0.0
+        # Bumped on every completion, so callers waiting on run_lock can tell a fresh result from an old one
+        self.completions = 0
+        # Held while the job runs so a resumed job and a client retry never run it twice
+        self.run_lock = threading.Lock()
+        self._lock = threading.RLock()
+
+    @property
+    def status(self) -> str:
+        if self.result is not None:
+            return "completed"
+        if self.error is not None:
+            return "failed"
+        return "running" if self.run_lock.locked() else "pending"
+
+    def replay(self) -> None:
+        """
+        Rebuild state from the journal file.
+        A torn final record (a crash mid-write) is cut off, so later appends start on a clean line.
+        """
+        good = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(record)
+                good += len(line)
+        if good < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+                os.fsync(f.fileno())
+
+    def _apply(self, record: dict) -> None:
+        kind = record["type"]
+        if kind == "start":
+            self.source, self.options, self.error = record["source"], record["options"], None
+        elif kind == "text":
+            self.text = record["text"]
+        elif kind == "step":
+            self.steps[record["key"]] = (record["raw"], record["usage"])
+        elif kind == "result":
+            self.result, self.delivered, self.error = record["response"], record["delivered"], None
+            self.completions += 1
+        elif kind == "delivered":
+            self.delivered = True
+        elif kind == "failed":
+            self.error = record["error"]
+        self.updated_at = record.get("at", self.updated_at)
+
+    def _write(self, record: dict) -> None:
+        record["at"] = time.time()
+        with self._lock:
+            _append(self.path, record)
+            self._apply(record)
+
+    def start(self, source: str, options: dict) -> None:
+        self._write({"type": "start", "source": source, "options": options})
+
+    def start_if_idle(self, source: str, options: dict) -> None:
+        """Start the job unless it is already under way, so concurrent identical requests start it once."""
+        with self._lock:
+            if self.source == "" or self.error is not None:
+                self.start(source, options)
+
+    def _temp_file(self) -> Tuple[int, str]:
+        # Unique per writer, and prefixed with the job id so cleanup() can attribute strays
+        return tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=f"{self.job_id}.", suffix=".tmp")
+
+    def record_upload(self, data: bytes) -> None:
+        """Keep the raw upload until its text is journaled, so a crash during extraction loses nothing."""
+        fd, tmp = self._temp_file()
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.upload_path)
+
+    def read_upload(self) -> Optional[bytes]:
+        try:
+            with open(self.upload_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def record_text(self, text: str) -> None:
+        self._write({"type": "text", "text": text})
+        try:
+            os.remove(self.upload_path)
+        except FileNotFoundError:
+            pass
+
+    def record_text_if_missing(self, text: str) -> None:
+        """Journal the text unless an identical request already did, without waiting on a run."""
+        with self._lock:
+            if self.text is None:
+                self.record_text(text)
+
+    def get(self, key: str) -> Optional[Tuple[str, dict]]:
+        return self.steps.get(key)
+
+    def put(self, key: str, raw: str, usage: dict) -> None:
+        self._write({"type": "step", "key": key, "raw": raw, "usage": usage})
+
+    def complete(self, response_json: str, delivered: bool = True) -> None:
+        self._write({"type": "result", "response": response_json, "delivered": delivered})
+
+    def mark_delivered(self) -> None:
+        self._write({"type": "delivered"})
+
+    def restart(self) -> None:
+        """
+        Start a completed job over (e.g. the same contract deliberately re-analyzed).
+        The journal is rewritten rather than appended to, so it doesn't grow with every re-run.
+        """
+        now = time.time()
+        records = [{"type": "start", "source": self.source, "options": self.options, "at": now}]
+        if self.text is not None:
+            records.append({"type": "text", "text": self.text, "at": now})
+        with self._lock:
+            fd, tmp = self._temp_file()
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self.steps, self.result, self.delivered, self.error = {}, None, False, None
+            self.updated_at = now
+
+    def fail(self, error: str) -> None:
+        self._write({"type": "failed", "error": error})
+
+
+class Journal:
+    """
+    Directory of job journals, one JSONL file per job.
+    Job ids are derived from the request content, so re-submitting the same upload
+    after a crash finds (and resumes or returns) the same job.
+    Only jobs that are open (new, running or awaiting resume) are kept in memory;
+    finished jobs are released and reloaded from disk when needed.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv("JOURNAL_DIR", DEFAULT_JOURNAL_DIR)
+        os.makedirs(self.directory, exist_ok=True)
+        self.retention_seconds = float(os.getenv("JOURNAL_RETENTION_HOURS", "24")) * 3600
+        self._jobs: Dict[str, JobJournal] = {}
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+    @staticmethod
+    def job_id(content: bytes, options: dict) -> str:
+        digest = hashlib.sha256(content)
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()[:32]
+
+    def _load(self, job_id: str) -> Optional[JobJournal]:
+        job = JobJournal(job_id, self.directory)
+        if not os.path.exists(job.path):
+            return None
+        job.replay()
+        return job
+
+    def get(self, job_id: str) -> Optional[JobJournal]:
+        """Return the job if it exists in memory or on disk. Jobs read from disk are not kept in memory."""
+        if not _JOB_ID_RE.fullmatch(job_id):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._load(job_id)
+
+    def open_job(self, job_id: str, source: str, options: dict) -> JobJournal:
+        """
+        Return the job for this request, creating its journal if it is new, and keep it in memory
+        until released, so identical concurrent requests share it.
+        A job that previously failed is restarted, keeping any steps it had completed.
+        """
+        self._maybe_cleanup()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._load(job_id) or JobJournal(job_id, self.directory)
+                self._jobs[job_id] = job
+        job.start_if_idle(source, options)
+        return job
+
+    def release(self, job: JobJournal) -> None:
+        """Drop a finished job from memory; its journal stays on disk until the retention period ends."""
+        with self._lock:
+            if self._jobs.get(job.job_id) is job and job.status in ("completed", "failed"):
+                del self._jobs[job.job_id]
+
+    def _job_ids(self) -> List[str]:
+        return [name[:-len(".jsonl")] for name in os.listdir(self.directory) if name.endswith(".jsonl")]
+
+    def outstanding_jobs(self) -> List[JobJournal]:
+        """
+        Jobs that were started but neither completed nor failed, e.g. cut off by a restart.
+        They are kept in memory so a client retrying one joins its resumed run.
+        """
+        outstanding = []
+        for job_id in self._job_ids():
+            job = self.get(job_id)
+            if job is not None and job.status == "pending":
+                with self._lock:
+                    outstanding.append(self._jobs.setdefault(job_id, job))
+        return outstanding
+
+    def completed_jobs(self) -> Iterator[JobJournal]:
+        """Completed jobs, read from disk one at a time."""
+        for job_id in self._job_ids():
+            job = self.get(job_id)
+            if job is not None and job.status == "completed":
+                yield job
+
+    def _maybe_cleanup(self) -> None:
+        if time.time() - self._last_cleanup >= CLEANUP_INTERVAL_SECONDS:
+            self.cleanup()
+
+    def cleanup(self) -> int:
+        """
+        Delete the files of jobs not touched within the retention period, skipping jobs still open
+        in memory. Goes by file modification time, so no journal has to be read.
+        Returns how many jobs were removed.
+        """
+        self._last_cleanup = time.time()
+        cutoff = self._last_cleanup - self.retention_seconds
+        removed = set()
+        with self._lock:
+            open_ids = set(self._jobs)
+        for name in os.listdir(self.directory):
+            # Journal, upload and temporary files all start with the job id
+            job_id = name[:32]
+            if job_id in open_ids:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed.add(job_id)
+            except FileNotFoundError:
+                pass
+        return len(removed)
@@ -1,22 +1,74 @@
 import os
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import time
+import uuid
+import logging
+import datetime
+import threading
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple, Union
 from dotenv import load_dotenv
+from pydantic import ValidationError
 
-from models import AnalyzeTextRequest, AnalyzeResponse, ContractAnalysis
+from models import (
+    AnalyzeTextRequest, AnalyzeResponse, ContractAnalysis,
+    PlaybookCompareRequest, PlaybookCompareResponse, PlaybookContractResult, SimilarContract,
+    UsageReport, AskRequest, AskResponse, ClauseMatch, AnalysisMode,
+    ExpiringContract, ExpiringContractsResponse, JobStatusResponse,
+)
 from pdf_parser import extract_text_from_pdf
-from analyzer import analyze_contract
+from analyzer import (
+    analyze_contract, analyze_contract_delta, analyze_contract_sectioned,
+    answer_question, create_context_cache,
+)
+from document_store import DocumentStore, StoredDocument
+from journal import JobJournal, Journal
+from normalizer import DateIndex, normalize_analysis
+from playbook import get_playbook
+from similarity import SimilarityIndex, clauses_with_fingerprints
+from responses import FastJSONResponse
+from routing import estimate_tokens
 
 MAX_PDF_SIZE_MB = 20
 MAX_PDF_BYTES = MAX_PDF_SIZE_MB * 1024 * 1024
+MIN_CONTRACT_CHARS = 50
+
+# Interrupted analyses resumed concurrently on startup
+MAX_RESUMED_JOBS = 4
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Previously analyzed contracts, used to spot near-duplicate uploads of the same template
+similarity_index = SimilarityIndex()
+
+# Segmented text of analyzed contracts, kept for follow-up questions
+document_store = DocumentStore()
+
+# Contract end dates, sorted for range queries such as "expiring in the next 90 days"
+end_date_index = DateIndex()
+
+# Write-ahead journal of analysis requests, replayed on startup after a crash or restart
+journal = Journal()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Recover in the background so the server starts accepting requests immediately
+    threading.Thread(target=_recover_jobs, name="journal-recovery", daemon=True).start()
+    yield
+
+
 app = FastAPI(
     title="ContractBot API",
     description="AI-powered contract analysis using Claude and PyMuPDF",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 # Allow Streamlit frontend to call the API
@@ -29,6 +81,251 @@ app.add_middleware(
 )
 
 
+def _run_analysis(
+    contract_text: str,
+    reuse_similar: bool = False,
+    mode: AnalysisMode = "monolithic",
+    job: Optional[JobJournal] = None,
+    delivered: bool = True,
+) -> AnalyzeResponse:
+    """
+    Run the model analysis and compare the result against the firm's playbook.
+    With reuse_similar, a near-duplicate of a previously analyzed contract reuses that
+    analysis and only the clauses that differ are sent to the model.
+    mode="sectioned" splits the analysis into concurrent per-section requests.
+    With a job, every completed model call and the final result are journaled, and calls
+    completed before a restart are not repeated. The job id doubles as the contract id.
+    """
+    reuse_threshold = float(os.getenv("SIMILARITY_REUSE_THRESHOLD", "0.8"))
+
+    try:
+        # A re-submitted contract is already indexed under its own (content-derived) id
+        match = similarity_index.find_nearest(contract_text, exclude_id=job.job_id if job else None)
+        similar = None
+        if match:
+            similar = SimilarContract(
+                contract_id=match.contract_id,
+                similarity=match.similarity,
+                changed_clauses=len(match.changed_clauses),
+                removed_clauses=len(match.removed_fingerprints),
+            )
+
+        usage = None
+        reuse = reuse_similar and match is not None and match.similarity >= reuse_threshold
+        removed_clauses: List[str] = []
+        if reuse and match.removed_fingerprints:
+            # The index keeps only fingerprints; the removed clauses' text comes from the stored contract
+            stored = _stored_contract(match.contract_id)
+            if stored is not None:
+                removed_clauses = clauses_with_fingerprints(stored[0], match.removed_fingerprints)
+            else:
+                # Without it the delta prompt can't say what was dropped, so analyze in full
+                reuse = False
+
+        if reuse:
+            # Verbatim reuse only when no clause was added, changed or removed
+            if match.changed_clauses or removed_clauses:
+                analysis, usage = analyze_contract_delta(
+                    match.analysis, match.changed_clauses, removed_clauses, checkpoint=job
+                )
+            else:
+                analysis = match.analysis
+            similar.reused = True
+        elif mode == "sectioned":
+            analysis, usage = analyze_contract_sectioned(contract_text, checkpoint=job)
+        else:
+            analysis, usage = analyze_contract(contract_text, checkpoint=job)
+
+        analysis.normalized = normalize_analysis(analysis)
+        contract_id = job.job_id if job else uuid.uuid4().hex
+        _register_contract(contract_id, contract_text, analysis)
+
+        deviations = get_playbook().evaluate(analysis, contract_text)
+        response = AnalyzeResponse(
+            success=True,
+            contract_id=contract_id,
+            analysis=analysis,
+            playbook_deviations=deviations,
+            similar_contract=similar,
+            usage=UsageReport(**usage) if usage else None,
+        )
+    except ValueError as e:
+        if job:
+            job.fail(str(e))
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        if job:
+            job.fail(str(e))
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+    if job:
+        job.complete(response.model_dump_json(), delivered=delivered)
+    return response
+
+
+def _register_contract(contract_id: str, contract_text: str, analysis: ContractAnalysis) -> None:
+    """Make an analyzed contract available to similarity lookups, follow-up questions and date queries."""
+    similarity_index.add(contract_id, contract_text, analysis)
+    document_store.put(contract_id, contract_text, analysis)
+    end_date_index.add(
+        contract_id,
+        analysis.normalized.end_date if analysis.normalized else None,
+        analysis.key_parties.party_1,
+        analysis.key_parties.party_2,
+    )
+
+
+def _run_job(job: JobJournal, seen: Optional[int] = None, delivered: bool = True) -> Union[AnalyzeResponse, str]:
+    """
+    Run a journaled analysis, returning either a fresh response or an already-serialized one.
+    Identical requests share one run: a caller that waited on a run in progress gets its result,
+    as does the first client to retry a job that finished during crash recovery.
+    A contract that already completed and was delivered is analyzed again.
+    seen is the job's completion count when the request opened it; any completion since then
+    is a run this request joined.
+    """
+    if seen is None:
+        seen = job.completions
+    try:
+        with job.run_lock:
+            if job.result is not None:
+                if job.completions != seen:
+                    return job.result
+                if not job.delivered:
+                    job.mark_delivered()
+                    return job.result
+                job.restart()
+            return _run_analysis(
+                job.text, reuse_similar=job.options["reuse_similar"], mode=job.options["mode"],
+                job=job, delivered=delivered,
+            )
+    finally:
+        # Finished jobs are reloaded from disk if asked for again
+        journal.release(job)
+
+
+def _analyze_text_job(contract_text: str, reuse_similar: bool, mode: AnalysisMode) -> Union[AnalyzeResponse, str]:
+    options = {"reuse_similar": reuse_similar, "mode": mode}
+    job = journal.open_job(Journal.job_id(contract_text.encode("utf-8"), options), "text", options)
+    # Taken before anything that could wait on a run of the same job
+    seen = job.completions
+    job.record_text_if_missing(contract_text)
+    return _run_job(job, seen)
+
+
+def _extract_job_text(job: JobJournal, file_bytes: bytes) -> None:
+    """
+    Extract and journal the text of an uploaded PDF, unless an identical upload already did.
+    The upload itself is journaled first, so a crash during extraction can still be resumed.
+    Runs under the job's run_lock, so concurrent identical uploads extract once.
+    Raises ValueError if the PDF holds no usable text.
+    """
+    with job.run_lock:
+        if job.text is not None:
+            return
+        job.record_upload(file_bytes)
+        try:
+            contract_text = extract_text_from_pdf(file_bytes)
+            if len(contract_text.strip()) < MIN_CONTRACT_CHARS:
+                raise ValueError("Could not extract meaningful text from the PDF. It may be scanned or image-based.")
+        except Exception as e:
+            job.fail(str(e))
+            raise
+        job.record_text(contract_text)
+
+
+def _open_pdf_job(file_bytes: bytes, reuse_similar: bool, mode: AnalysisMode) -> Tuple[JobJournal, int]:
+    """Open the job for an upload and make sure its text is journaled. Returns the job and its completion count."""
+    options = {"reuse_similar": reuse_similar, "mode": mode}
+    job = journal.open_job(Journal.job_id(file_bytes, options), "pdf", options)
+    # Taken before extraction, which may wait on a run of the same job
+    seen = job.completions
+    if job.text is None:
+        try:
+            _extract_job_text(job, file_bytes)
+        except Exception:
+            journal.release(job)
+            raise
+    return job, seen
+
+
+def _resume_job(job: JobJournal) -> None:
+    """Finish one analysis interrupted by a restart, from its last journaled step."""
+    try:
+        if job.text is None:
+            file_bytes = job.read_upload()
+            if file_bytes is None:
+                job.fail("The upload was lost before its text was journaled")
+                return
+            _extract_job_text(job, file_bytes)
+        # Nobody is waiting for this result; hand it to the first client that retries
+        _run_job(job, delivered=False)
+        logger.info("Resumed analysis %s", job.job_id)
+    except HTTPException as e:
+        logger.warning("Resumed analysis %s failed: %s", job.job_id, e.detail)
+    except ValueError as e:
+        logger.warning("Resumed analysis %s failed: %s", job.job_id, e)
+    except Exception:
+        logger.exception("Could not resume analysis %s", job.job_id)
+    finally:
+        journal.release(job)
+
+
+def _recover_jobs() -> None:
+    """
+    Rebuild in-memory state from the journal after a restart: drop expired journals,
+    re-register completed contracts, then resume analyses that were cut off mid-flight.
+    Later sweeps of expired journals run as new requests arrive (see Journal.open_job).
+    """
+    journal.cleanup()
+
+    for job in journal.completed_jobs():
+        try:
+            response = AnalyzeResponse.model_validate_json(job.result)
+            if response.analysis is not None and job.text is not None:
+                _register_contract(response.contract_id, job.text, response.analysis)
+        except Exception:
+            # e.g. a result written before a response schema change; skip it, keep recovering
+            logger.exception("Could not restore completed analysis %s", job.job_id)
+
+    outstanding = journal.outstanding_jobs()
+    if outstanding:
+        logger.info("Resuming %d interrupted analyses", len(outstanding))
+        with ThreadPoolExecutor(max_workers=MAX_RESUMED_JOBS) as pool:
+            list(pool.map(_resume_job, outstanding))
+
+
+def _get_context_cache(document: StoredDocument) -> Optional[str]:
+    """
+    Return a live model-side context cache for the document, creating it on first use.
+    Documents below the provider's minimum cacheable size never get one.
+    """
+    min_tokens = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "32768"))
+    ttl_minutes = int(os.getenv("CONTEXT_CACHE_TTL_MINUTES", "30"))
+    if estimate_tokens(document.text) < min_tokens:
+        return None
+
+    with document.cache_lock:
+        # Leave a minute of slack so a cache doesn't expire mid-request
+        if document.cache_expires_at > time.time() + 60:
+            return document.cache_name
+        created = create_context_cache(document.text, ttl_minutes)
+        if created:
+            document.cache_name, document.cache_expires_at = created
+        else:
+            # Caching unavailable: remember that for the TTL instead of retrying every question
+            document.cache_name, document.cache_expires_at = None, time.time() + ttl_minutes * 60
+        return document.cache_name
+
+
+def _search_clauses(document: StoredDocument, question: str, top_k: int) -> List[ClauseMatch]:
+    matches = document.get_index().search(question, top_k=top_k)
+    return [
+        ClauseMatch(clause_number=i + 1, text=document.clauses[i], score=round(score, 3))
+        for i, score in matches
+    ]
+
+
 @app.get("/")
 def root():
     return {"message": "ContractBot API is running. POST to /analyze to analyze a contract."}
@@ -44,24 +341,24 @@ async def analyze_text(request: AnalyzeTextRequest):
     """
     Analyze a contract provided as plain text.
     """
-    if not request.contract_text or len(request.contract_text.strip()) < 50:
+    if not request.contract_text or len(request.contract_text.strip()) < MIN_CONTRACT_CHARS:
         raise HTTPException(
             status_code=400,
             detail="Contract text is too short or empty. Please provide the full contract text."
         )
 
-    try:
-        raw_analysis = analyze_contract(request.contract_text)
-        analysis = ContractAnalysis(**raw_analysis)
-        return AnalyzeResponse(success=True, analysis=analysis)
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    # Model calls block, so run them off the event loop to keep serving other requests
+    return FastJSONResponse(await run_in_threadpool(
+        _analyze_text_job, request.contract_text, request.reuse_similar, request.mode
+    ))
 
 
 @app.post("/analyze/pdf", response_model=AnalyzeResponse)
-async def analyze_pdf(file: UploadFile = File(...)):
+async def analyze_pdf(
+    file: UploadFile = File(...),
+    reuse_similar: bool = Form(False),
+    mode: AnalysisMode = Form("monolithic"),
+):
     """
     Analyze a contract provided as a PDF upload.
     """
@@ -80,23 +377,165 @@ async def analyze_pdf(file: UploadFile = File(...)):
 
     try:
         file_bytes = await file.read()
-        contract_text = extract_text_from_pdf(file_bytes)
+        # Journals the upload and its extracted text before any model call is made
+        job, seen = await run_in_threadpool(_open_pdf_job, file_bytes, reuse_similar, mode)
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF parsing failed: {str(e)}")
 
-    if len(contract_text.strip()) < 50:
+    return FastJSONResponse(await run_in_threadpool(_run_job, job, seen))
+
+
+def _stored_contract(contract_id: str) -> Optional[Tuple[str, ContractAnalysis]]:
+    """Text and analysis of a previously analyzed contract, from memory or, failing that, its journal."""
+    document = document_store.get(contract_id)
+    if document is not None and document.analysis is not None:
+        return document.text, document.analysis
+    job = journal.get(contract_id)
+    if job is None or not job.result or job.text is None:
+        return None
+    try:
+        response = AnalyzeResponse.model_validate_json(job.result)
+    except ValidationError:
+        return None
+    return (job.text, response.analysis) if response.analysis is not None else None
+
+
+def _compare_stored(playbook, contract_ids: List[str]) -> List[PlaybookContractResult]:
+    results = []
+    for contract_id in contract_ids:
+        stored = _stored_contract(contract_id)
+        if stored is None:
+            results.append(PlaybookContractResult(
+                contract_id=contract_id, error="Contract not found. Analyze it first, then compare by contract_id."
+            ))
+            continue
+        text, analysis = stored
+        if analysis.normalized is None:
+            analysis.normalized = normalize_analysis(analysis)
+        results.append(PlaybookContractResult(contract_id=contract_id, deviations=playbook.evaluate(analysis, text)))
+    return results
+
+
+@app.post("/playbook/compare", response_model=PlaybookCompareResponse)
+async def compare_playbook(request: PlaybookCompareRequest):
+    """
+    Compare already-analyzed contracts (e.g. a stored portfolio) against the firm's playbook.
+    Contracts given by contract_id are evaluated with their stored text; analyses posted in the
+    body have no text, so "*" rules only see the clauses they quote.
+    No model calls are made, so this is cheap enough to run over many contracts at once.
+    """
+    try:
+        playbook = get_playbook()
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Stored contracts may have to be read back from the journal on disk
+    results = await run_in_threadpool(_compare_stored, playbook, request.contract_ids)
+
+    for contract in request.contracts:
+        if contract.analysis.normalized is None:
+            contract.analysis.normalized = normalize_analysis(contract.analysis)
+
+    results += [
+        PlaybookContractResult(
+            contract_id=contract.contract_id,
+            deviations=playbook.evaluate(contract.analysis),
+        )
+        for contract in request.contracts
+    ]
+    return FastJSONResponse(PlaybookCompareResponse(results=results))
+
+
+@app.post("/ask", response_model=AskResponse)
+async def ask(request: AskRequest):
+    """
+    Answer a follow-up question about a previously analyzed contract.
+    Only the clauses most relevant to the question are sent to the model.
+    """
+    if len(request.question.strip()) < 5:
+        raise HTTPException(status_code=400, detail="Please enter a question about the contract.")
+
+    document = document_store.get(request.document_id)
+    if document is None:
         raise HTTPException(
-            status_code=422,
-            detail="Could not extract meaningful text from the PDF. It may be scanned or image-based."
+            status_code=404,
+            detail="Document not found. Analyze the contract first, then ask using its contract_id."
         )
 
     try:
-        raw_analysis = analyze_contract(contract_text)
-        analysis = ContractAnalysis(**raw_analysis)
-        return AnalyzeResponse(success=True, analysis=analysis)
+        # The first question builds the clause index, so keep it off the event loop too
+        clauses = await run_in_threadpool(_search_clauses, document, request.question, request.top_k)
+        cache_name = await run_in_threadpool(_get_context_cache, document)
+
+        if not clauses and not cache_name:
+            return FastJSONResponse(AskResponse(
+                success=True,
+                answer="No clause in this contract matches the question. Try rephrasing it with terms used in the contract.",
+            ))
+
+        answer, usage = await run_in_threadpool(
+            answer_question,
+            request.question,
+            [(c.clause_number, c.text) for c in clauses],
+            cached_content=cache_name,
+            cached_document_tokens=estimate_tokens(document.text) if cache_name else 0,
+        )
+        return FastJSONResponse(AskResponse(
+            success=True,
+            answer=answer,
+            clauses=clauses,
+            used_context_cache=cache_name is not None,
+            usage=UsageReport(**usage),
+        ))
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Question failed: {str(e)}")
+
+
+@app.get("/contracts/expiring", response_model=ExpiringContractsResponse)
+def contracts_expiring(days: int = Query(90, ge=0, le=3650)):
+    """
+    List analyzed contracts whose normalized end date falls within the next `days` days.
+    Answered from the sorted end-date index, without re-reading any contract text.
+    """
+    today = datetime.date.today()
+    contracts = []
+    for end_date, contract_id, party_1, party_2 in end_date_index.range(today, today + datetime.timedelta(days=days)):
+        contracts.append(ExpiringContract(
+            contract_id=contract_id,
+            end_date=end_date,
+            days_remaining=(end_date - today).days,
+            party_1=party_1,
+            party_2=party_2,
+        ))
+    return FastJSONResponse(ExpiringContractsResponse(contracts=contracts))
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def job_status(job_id: str):
+    """
+    Report on a journaled analysis, e.g. one resumed after a restart.
+    The job id of an analysis is the contract_id it returns.
+    """
+    job = journal.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or its journal has expired.")
+
+    result, error = None, job.error
+    if job.result:
+        try:
+            result = AnalyzeResponse.model_validate_json(job.result)
+        except ValidationError as e:
+            logger.warning("Stored result of %s no longer validates: %s", job.job_id, e)
+            error = "The stored result no longer matches the current response format. Re-submit the contract."
+    return FastJSONResponse(JobStatusResponse(
+        job_id=job.job_id,
+        status=job.status,
+        source=job.source,
+        completed_steps=len(job.steps),
+        result=result,
+        error=error,
+    ))
@@ -1,9 +1,16 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import date
+from decimal import Decimal
+
+# "monolithic": one request for the whole schema; "sectioned": concurrent per-section requests
+AnalysisMode = Literal["monolithic", "sectioned"]
 
 
 class AnalyzeTextRequest(BaseModel):
     contract_text: str
+    reuse_similar: bool = False
+    mode: AnalysisMode = "monolithic"
 
 
 class Party(BaseModel):
@@ -50,6 +57,22 @@ class UnusualClause(BaseModel):
     why_it_is_risky: str = ""
 
 
+class Money(BaseModel):
+    currency: str = ""
+    amount: Decimal
+    raw: str = ""
+
+
+class NormalizedFields(BaseModel):
+    """Typed values parsed from the free-form fields above; the raw strings are kept as-is."""
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    amounts: List[Money] = []
+    notice_period_days: Optional[int] = None
+    liability_cap: Optional[Money] = None
+    liability_cap_period_days: Optional[int] = None
+
+
 class ContractAnalysis(BaseModel):
     plain_english_summary: str = ""
     key_parties: Party = Party()
@@ -61,9 +84,112 @@ class ContractAnalysis(BaseModel):
     liability_and_indemnity: LiabilityAndIndemnity = LiabilityAndIndemnity()
     risk_flags: List[RiskFlag] = []
     unusual_or_risky_clauses: List[UnusualClause] = []
+    normalized: Optional[NormalizedFields] = None
+
+
+class PlaybookDeviation(BaseModel):
+    rule_id: str = ""
+    category: str = ""
+    field: str = ""
+    expected: str = ""
+    actual: str = ""
+    risk_level: str = ""
+    reason: str = ""
+
+
+class SimilarContract(BaseModel):
+    contract_id: str
+    similarity: float
+    changed_clauses: int = 0
+    removed_clauses: int = 0
+    reused: bool = False
+
+
+class UsageReport(BaseModel):
+    model: str = ""
+    strategy: str = ""
+    calls: int = 0
+    max_output_tokens: int = 0
+    predicted_input_tokens: int = 0
+    predicted_output_tokens: int = 0
+    actual_input_tokens: int = 0
+    actual_output_tokens: int = 0
+    cached_input_tokens: int = 0
+    latency_ms: int = 0
 
 
 class AnalyzeResponse(BaseModel):
     success: bool
+    contract_id: Optional[str] = None
     analysis: Optional[ContractAnalysis] = None
+    playbook_deviations: List[PlaybookDeviation] = []
+    similar_contract: Optional[SimilarContract] = None
+    usage: Optional[UsageReport] = None
+    error: Optional[str] = None
+
+
+class PortfolioContract(BaseModel):
+    contract_id: str
+    analysis: ContractAnalysis
+
+
+class PlaybookCompareRequest(BaseModel):
+    # Previously analyzed contracts, compared with their stored text
+    contract_ids: List[str] = []
+    # Analyses supplied by the caller; without contract text, "*" rules only see quoted clauses
+    contracts: List[PortfolioContract] = []
+
+
+class PlaybookContractResult(BaseModel):
+    contract_id: str
+    deviations: List[PlaybookDeviation] = []
+    error: Optional[str] = None
+
+
+class PlaybookCompareResponse(BaseModel):
+    results: List[PlaybookContractResult] = []
+
+
+class AskRequest(BaseModel):
+    document_id: str
+    question: str
+    top_k: int = Field(default=5, ge=1, le=20)
+
+
+class ClauseMatch(BaseModel):
+    clause_number: int
+    text: str
+    score: float
+
+
+class AskResponse(BaseModel):
+    success: bool
+    answer: str = ""
+    clauses: List[ClauseMatch] = []
+    used_context_cache: bool = False
+    usage: Optional[UsageReport] = None
+    error: Optional[str] = None
+
+
+class ExpiringContract(BaseModel):
+    contract_id: str
+    end_date: date
+    days_remaining: int
+    party_1: str = ""
+    party_2: str = ""
+
+
+class ExpiringContractsResponse(BaseModel):
+    contracts: List[ExpiringContract] = []
+
+
+JobStatus = Literal["pending", "running", "completed", "failed"]
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+    source: str
+    completed_steps: int = 0
+    result: Optional[AnalyzeResponse] = None
     error: Optional[str] = None
@@ -0,0 +1,249 @@
+import re
+import bisect
+import calendar
+import datetime
+import threading
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+from models import ContractAnalysis, Money, NormalizedFields
+
+# ── Durations ────────────────────────────────────────────────────────────────
+
+_UNIT_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+_TENS_WORDS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_UNIT_DAYS = {"day": 1, "week": 7, "month": 30, "year": 365}
+DAYS_PER_MONTH = _UNIT_DAYS["month"]
+
+
+def _alternation(words) -> str:
+    # Longest first, so "seventeen" is not read as "seven"
+    return "|".join(sorted(words, key=len, reverse=True))
+
+
+# "sixty", "forty-five", "twenty four", "twelve"
+_NUMBER_WORD = (
+    rf"(?:{_alternation(_TENS_WORDS)})(?:[\s-](?:{_alternation(w for w, n in _UNIT_WORDS.items() if n < 10)}))?"
+    rf"|{_alternation(_UNIT_WORDS)}"
+)
+
+# Matches "30 days", "twelve (12) months", "1 year", "60-day", "sixty-day", "thirty (30)-day" etc.
+_DURATION_RE = re.compile(
+    rf"\b(\d+(?:\.\d+)?|{_NUMBER_WORD})"
+    r"[\s-]*(?:\(\d+\)[\s-]*)?(?:calendar\s+|business\s+)?(day|week|month|year)s?\b",
+    re.IGNORECASE,
+)
+
+
+def _number_word_value(words: str) -> int:
+    return sum(_TENS_WORDS.get(word, 0) or _UNIT_WORDS.get(word, 0) for word in re.split(r"[\s-]+", words))
+
+
+def _parse_duration(text: str) -> Optional[Tuple[float, str]]:
+    """Return the first duration in the text as (number, unit), or None."""
+    match = _DURATION_RE.search(text or "")
+    if not match:
+        return None
+    amount = match.group(1).lower()
+    number = float(amount) if amount[0].isdigit() else _number_word_value(amount)
+    return number, match.group(2).lower()
+
+
+def parse_duration_days(text: str) -> Optional[float]:
+    """
+    Return the first duration mentioned in the text, converted to days.
+    Returns None if no duration could be found.
+    """
+    duration = _parse_duration(text)
+    if duration is None:
+        return None
+    number, unit = duration
+    return number * _UNIT_DAYS[unit]
+
+
+# ── Dates ────────────────────────────────────────────────────────────────────
+
+_MONTHS = {
+    name: i + 1
+    for i, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"),
+        ("may",), ("june", "jun"), ("july", "jul"), ("august", "aug"),
+        ("september", "sep", "sept"), ("october", "oct"), ("november", "nov"), ("december", "dec"),
+    ])
+    for name in names
+}
+_MONTH_ALT = "|".join(sorted(_MONTHS, key=len, reverse=True))
+
+# One alternation so each string is scanned once; the first matching form wins
+_DATE_RE = re.compile(
+    r"\b(?:"
+    r"(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2})"
+    rf"|(?P<mdy_m>{_MONTH_ALT})\.?\s+(?P<mdy_d>\d{{1,2}})(?:st|nd|rd|th)?,?\s+(?P<mdy_y>\d{{4}})"
+    rf"|(?P<dmy_d>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:day\s+of\s+)?(?P<dmy_m>{_MONTH_ALT})\.?,?\s+(?P<dmy_y>\d{{4}})"
+    r"|(?P<num_a>\d{1,2})[/.](?P<num_b>\d{1,2})[/.](?P<num_y>\d{4})"
+    r")\b",
+    re.IGNORECASE,
+)
+
+
+def parse_date(text: str) -> Optional[datetime.date]:
+    """
+    Return the first calendar date in the text, or None.
+    Numeric dates are read month-first (01/02/2024 is January 2) unless the first number
+    cannot be a month.
+    """
+    match = _DATE_RE.search(text or "")
+    if not match:
+        return None
+    g = match.groupdict()
+    try:
+        if g["iso_y"]:
+            return datetime.date(int(g["iso_y"]), int(g["iso_m"]), int(g["iso_d"]))
+        if g["mdy_y"]:
+            return datetime.date(int(g["mdy_y"]), _MONTHS[g["mdy_m"].lower()], int(g["mdy_d"]))
+        if g["dmy_y"]:
+            return datetime.date(int(g["dmy_y"]), _MONTHS[g["dmy_m"].lower()], int(g["dmy_d"]))
+        a, b = int(g["num_a"]), int(g["num_b"])
+        month, day = (b, a) if a > 12 else (a, b)
+        return datetime.date(int(g["num_y"]), month, day)
+    except ValueError:
+        # Matched the shape of a date but not a real one (e.g. February 30)
+        return None
+
+
+# ── Money ────────────────────────────────────────────────────────────────────
+
+_CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "₹": "INR", "¥": "JPY"}
+_CURRENCY_CODES = ("USD", "EUR", "GBP", "INR", "JPY", "CAD", "AUD", "CHF", "SGD", "CNY")
+_MULTIPLIERS = {
+    "k": 1_000, "thousand": 1_000,
+    "lakh": 100_000, "crore": 10_000_000,
+    "m": 1_000_000, "mm": 1_000_000, "million": 1_000_000,
+    "bn": 1_000_000_000, "billion": 1_000_000_000,
+}
+
+# Indian grouping (1,00,000), thousands grouping (100,000) or plain digits. The lookahead rejects
+# a number that only matched part of a longer one, rather than reading "1,00,000" as 1.
+_NUMBER = r"(?:\d{1,2}(?:,\d{2})+,\d{3}|\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?![.,]?\d)"
+_MULT = r"(?:\s*(?P<{}>thousand|million|billion|lakh|crore|bn|mm|k|m)\b)?"
+_CODES = "|".join(_CURRENCY_CODES)
+_MONEY_RE = re.compile(
+    rf"(?:(?P<sym>[$€£₹¥])|\b(?P<code>{_CODES}))\s?(?P<num>{_NUMBER}){_MULT.format('mult')}"
+    rf"|(?P<num2>{_NUMBER}){_MULT.format('mult2')}\s?(?P<code2>{_CODES})\b",
+    re.IGNORECASE,
+)
+
+
+def parse_money(text: str) -> List[Money]:
+    """Return every currency amount in the text, in order of appearance."""
+    amounts = []
+    for match in _MONEY_RE.finditer(text or ""):
+        g = match.groupdict()
+        number = g["num"] or g["num2"]
+        multiplier = (g["mult"] or g["mult2"] or "").lower()
+        currency = _CURRENCY_SYMBOLS.get(g["sym"]) if g["sym"] else (g["code"] or g["code2"]).upper()
+        try:
+            amount = Decimal(number.replace(",", "")) * _MULTIPLIERS.get(multiplier, 1)
+        except InvalidOperation:
+            continue
+        amounts.append(Money(currency=currency, amount=amount, raw=match.group(0).strip()))
+    return amounts
+
+
+# ── Analysis normalization ───────────────────────────────────────────────────
+
+def _days(text: str) -> Optional[int]:
+    days = parse_duration_days(text)
+    return int(round(days)) if days is not None else None
+
+
+def add_duration(start: datetime.date, text: str) -> Optional[datetime.date]:
+    """
+    Return the date a duration in the text ends when counted from start, or None if the text has
+    no duration. Months and years are calendar months and years (a day that doesn't exist in the
+    final month, e.g. 31 February, becomes its last day).
+    """
+    duration = _parse_duration(text)
+    if duration is None:
+        return None
+    number, unit = duration
+    if unit in ("day", "week"):
+        return start + datetime.timedelta(days=round(number * _UNIT_DAYS[unit]))
+    months = start.month - 1 + round(number * (12 if unit == "year" else 1))
+    year, month = start.year + months // 12, months % 12 + 1
+    return start.replace(year=year, month=month, day=min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def _end_date(start_date: Optional[datetime.date], end_text: str) -> Optional[datetime.date]:
+    end_date = parse_date(end_text)
+    # A relative term ("three years from the Effective Date") ends that long after the start;
+    # a notice period in the same text is not the term
+    if end_date is None and start_date is not None and "notice" not in (end_text or "").lower():
+        end_date = add_duration(start_date, end_text)
+    return end_date
+
+
+def normalize_analysis(analysis: ContractAnalysis) -> NormalizedFields:
+    """
+    Parse the free-form date, money and duration fields of an analysis into typed values.
+    The raw strings are left untouched; anything that cannot be parsed stays None/empty.
+    """
+    liability_cap = analysis.liability_and_indemnity.liability_cap
+    cap_amounts = parse_money(liability_cap)
+    start_date = parse_date(analysis.contract_duration.start_date)
+    return NormalizedFields(
+        start_date=start_date,
+        end_date=_end_date(start_date, analysis.contract_duration.end_date),
+        amounts=parse_money(analysis.payment_terms.amounts),
+        notice_period_days=_days(analysis.termination_clauses.notice_period),
+        liability_cap=cap_amounts[0] if cap_amounts else None,
+        liability_cap_period_days=_days(liability_cap),
+    )
+
+
+class DateIndex:
+    """
+    Sorted (date, contract_id, party_1, party_2) index supporting range queries by bisection,
+    e.g. every contract whose end date falls in the next 90 days.
+    The parties are kept in the entry so a query needs nothing else in memory.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[datetime.date, str, str, str]] = []
+        self._by_id: Dict[str, Tuple[datetime.date, str, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, contract_id: str, value: Optional[datetime.date], party_1: str = "", party_2: str = "") -> None:
+        with self._lock:
+            self._discard(contract_id)
+            if value is None:
+                return
+            entry = (value, contract_id, party_1, party_2)
+            bisect.insort(self._entries, entry)
+            self._by_id[contract_id] = entry
+
+    def remove(self, contract_id: str) -> None:
+        with self._lock:
+            self._discard(contract_id)
+
+    def _discard(self, contract_id: str) -> None:
+        entry = self._by_id.pop(contract_id, None)
+        if entry is not None:
+            del self._entries[bisect.bisect_left(self._entries, entry)]
+
+    def range(self, start: datetime.date, end: datetime.date) -> List[Tuple[datetime.date, str, str, str]]:
+        """All (date, contract_id, party_1, party_2) entries with start <= date <= end, earliest first."""
+        with self._lock:
+            lo = bisect.bisect_left(self._entries, (start,))
+            hi = bisect.bisect_left(self._entries, (end + datetime.timedelta(days=1),))
+            return self._entries[lo:hi]
@@ -0,0 +1,215 @@
+import os
+import re
+import json
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from models import ContractAnalysis, PlaybookDeviation
+from normalizer import DAYS_PER_MONTH, parse_duration_days
+
+# The firm's standard positions. Override with PLAYBOOK_PATH to point at another rule file.
+DEFAULT_PLAYBOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "playbook.json")
+
+# Rules with field "*" are matched against the contract text and the clauses the analysis quotes,
+# never the model's own commentary (a summary saying "no unlimited liability" must not trip them)
+WILDCARD_FIELD = "*"
+
+NUMERIC_CHECKS = {"min_days", "max_days", "min_months", "max_months"}
+PHRASE_CHECKS = {"required_phrase", "forbidden_phrase"}
+VALID_CHECKS = NUMERIC_CHECKS | PHRASE_CHECKS | {"equals", "specified"}
+
+EMPTY_VALUES = ("", "not specified", "not found", "n/a", "none")
+
+# A field that states a right is absent, e.g. "No termination for convenience" or "Neither party may ..."
+_NEGATED_RE = re.compile(
+    r"^\W*(?:no|none|not|neither|nor|cannot|n/a)\b"
+    r"|\b(?:is|are|does|do|shall|will|may)\s+not\b"
+    r"|\bnot\s+(?:permitted|allowed|available|provided|granted)\b"
+    r"|\bno\s+right\b",
+    re.IGNORECASE,
+)
+
+# Fields whose durations are already parsed by the normalization stage
+NORMALIZED_DURATION_FIELDS = {
+    "termination_clauses.notice_period": "notice_period_days",
+    "liability_and_indemnity.liability_cap": "liability_cap_period_days",
+}
+
+
+def _flatten(value, prefix: str = "") -> Dict[str, str]:
+    """Flatten a dumped ContractAnalysis into {"dotted.path": "text"}."""
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if isinstance(value, list):
+        parts = []
+        for item in value:
+            parts.extend(_flatten(item).values() if isinstance(item, dict) else [str(item)])
+        return {prefix: "\n".join(parts)}
+    return {prefix: "" if value is None else str(value)}
+
+
+def _phrase_regex(phrase: str) -> str:
+    """Match the phrase's words separated by any whitespace, e.g. a line break in PDF-extracted text."""
+    return r"\s+".join(re.escape(word) for word in phrase.split())
+
+
+def _is_empty(text: str) -> bool:
+    return text.strip().lower() in EMPTY_VALUES
+
+
+def _wildcard_text(analysis: ContractAnalysis, contract_text: str) -> str:
+    """The text "*" rules see: the contract itself plus the clauses the analysis quotes from it."""
+    quoted = [item.clause for item in analysis.unusual_or_risky_clauses if item.clause]
+    return "\n".join([contract_text or ""] + quoted)
+
+
+class Playbook:
+    """
+    In-memory, indexed set of playbook rules.
+    Rules are grouped by the field they inspect, and all phrase rules for a field are
+    compiled into a single alternation regex, so a field with no phrase in it is scanned once.
+    Phrases match across any whitespace, so line breaks in PDF-extracted text don't hide them.
+    """
+
+    def __init__(self, rules: List[dict]):
+        self.rules = [self._validate_rule(rule) for rule in rules]
+
+        # field -> numeric / equals rules
+        self._value_rules: Dict[str, List[dict]] = {}
+        # field -> (compiled alternation of all phrases, [(phrase, own pattern, rules)])
+        self._phrase_index: Dict[str, Tuple[re.Pattern, List[Tuple[str, re.Pattern, List[dict]]]]] = {}
+
+        phrases_by_field: Dict[str, Dict[str, List[dict]]] = {}
+        for rule in self.rules:
+            if rule["check"] in PHRASE_CHECKS:
+                phrase = " ".join(rule["value"].lower().split())
+                phrases_by_field.setdefault(rule["field"], {}).setdefault(phrase, []).append(rule)
+            else:
+                self._value_rules.setdefault(rule["field"], []).append(rule)
+
+        for field, phrases in phrases_by_field.items():
+            # Longest first so overlapping phrases prefer the most specific match
+            ordered = sorted(phrases, key=len, reverse=True)
+            entries = [(phrase, re.compile(_phrase_regex(phrase), re.IGNORECASE), phrases[phrase]) for phrase in ordered]
+            alternation = "|".join(f"(?P<p{i}>{_phrase_regex(phrase)})" for i, phrase in enumerate(ordered))
+            self._phrase_index[field] = (re.compile(alternation, re.IGNORECASE), entries)
+
+    @staticmethod
+    def _validate_rule(rule: dict) -> dict:
+        required = ("id", "field", "check") if rule.get("check") == "specified" else ("id", "field", "check", "value")
+        missing = [key for key in required if key not in rule]
+        if missing:
+            raise ValueError(f"Playbook rule {rule.get('id', '?')} is missing: {', '.join(missing)}")
+        if rule["check"] not in VALID_CHECKS:
+            raise ValueError(f"Playbook rule {rule['id']} has unknown check '{rule['check']}'")
+        return {
+            "category": "",
+            "risk_level": "Medium",
+            "description": "",
+            **rule,
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> "Playbook":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Could not load playbook from {path}: {str(e)}")
+        return cls(data.get("rules", []))
+
+    def evaluate(self, analysis: ContractAnalysis, contract_text: str = "") -> List[PlaybookDeviation]:
+        """
+        Compare one analysis against every rule and return the deviations found.
+        """
+        fields = _flatten(analysis.model_dump(exclude={"normalized"}))
+        durations = {}
+        if analysis.normalized is not None:
+            durations = {
+                field: getattr(analysis.normalized, attr)
+                for field, attr in NORMALIZED_DURATION_FIELDS.items()
+            }
+        if self._phrase_index.get(WILDCARD_FIELD):
+            fields[WILDCARD_FIELD] = _wildcard_text(analysis, contract_text)
+
+        deviations = []
+        for field, rules in self._value_rules.items():
+            actual = fields.get(field, "")
+            for rule in rules:
+                deviation = self._check_value(rule, actual, durations.get(field))
+                if deviation:
+                    deviations.append(deviation)
+
+        for field, (pattern, entries) in self._phrase_index.items():
+            text = fields.get(field, "")
+            # One scan finds the phrases present; a phrase hidden by an overlapping longer match
+            # (e.g. "discretion" inside "sole discretion") is then checked on its own
+            found = {int(m.lastgroup[1:]) for m in pattern.finditer(text)}
+            for i, (phrase, phrase_pattern, rules) in enumerate(entries):
+                present = i in found or (bool(found) and phrase_pattern.search(text) is not None)
+                for rule in rules:
+                    if rule["check"] == "forbidden_phrase" and present:
+                        deviations.append(self._deviation(
+                            rule, actual=phrase, reason=f"Contains '{rule['value']}'"
+                        ))
+                    elif rule["check"] == "required_phrase" and not present:
+                        deviations.append(self._deviation(
+                            rule, actual=text or "Not specified",
+                            reason=f"Does not mention '{rule['value']}'"
+                        ))
+
+        return deviations
+
+    def _check_value(self, rule: dict, actual: str, days: Optional[float] = None) -> Optional[PlaybookDeviation]:
+        if rule["check"] == "specified":
+            if _is_empty(actual):
+                return self._deviation(rule, actual="Not specified", reason="Not specified in contract")
+            if _NEGATED_RE.search(actual):
+                return self._deviation(rule, actual=actual, reason="Contract states this is not provided")
+            return None
+
+        if rule["check"] == "equals":
+            if actual.strip().lower() != str(rule["value"]).strip().lower():
+                return self._deviation(rule, actual=actual or "Not specified", reason="Differs from standard position")
+            return None
+
+        if _is_empty(actual):
+            return self._deviation(rule, actual="Not specified", reason="Not specified in contract")
+
+        if days is None:
+            days = parse_duration_days(actual)
+        if days is None:
+            return self._deviation(rule, actual=actual, reason="Could not verify against standard position")
+
+        check, limit = rule["check"], float(rule["value"])
+        value = days / DAYS_PER_MONTH if check.endswith("_months") else days
+        if (check.startswith("min_") and value < limit) or (check.startswith("max_") and value > limit):
+            return self._deviation(rule, actual=actual, reason="Outside standard position")
+        return None
+
+    @staticmethod
+    def _deviation(rule: dict, actual: str, reason: str) -> PlaybookDeviation:
+        return PlaybookDeviation(
+            rule_id=rule["id"],
+            category=rule["category"],
+            field=rule["field"],
+            expected=rule["description"] or f"{rule['check']} {rule.get('value', '')}".strip(),
+            actual=actual,
+            risk_level=rule["risk_level"],
+            reason=reason,
+        )
+
+
+@lru_cache(maxsize=None)
+def _load_playbook(path: str) -> Playbook:
+    return Playbook.from_file(path)
+
+
+def get_playbook() -> Playbook:
+    """
+    Return the configured playbook. Rules are parsed and indexed once per path.
+    """
+    return _load_playbook(os.getenv("PLAYBOOK_PATH", DEFAULT_PLAYBOOK_PATH))
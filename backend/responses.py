@@ -0,0 +1,24 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response that serializes in a single pass.
+    Pydantic models are written straight to bytes by pydantic-core (no jsonable_encoder dict
+    copy), plain dicts/lists go through orjson, and already-serialized JSON (e.g. a journaled
+    result) is sent as-is. Returning one of these from an endpoint also skips FastAPI's
+    re-validation against response_model.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        return orjson.dumps(content)
@@ -0,0 +1,91 @@
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that carry no retrieval signal in contract questions
+STOPWORDS = frozenset(
+    "a an and are as at be by can does do for from how if in is it its of on or shall "
+    "that the this to under what when where which who will with".split()
+)
+
+
+# Inflectional/derivational endings stripped by stem(), so "termination", "terminate" and
+# "terminates" share one term. Tried longest first.
+_SUFFIXES = sorted((
+    "ations", "ation", "ating", "ated", "ates", "ate",
+    "ifications", "ification", "ified", "ifies", "ify",
+    "ings", "ing", "ions", "ion", "ments", "ment",
+    "alities", "ality", "ities", "ity", "bility", "able", "ble",
+    "ness", "ives", "ive", "als", "al", "ers", "er",
+    "ies", "ied", "ed", "es", "ly", "y", "s",
+), key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+
+def stem(token: str) -> str:
+    """
+    Light suffix stemmer: strip the longest known ending that leaves a usable stem, then a final "e".
+    Not linguistically exact, but applied to clauses and queries alike, so variants of a word meet.
+    """
+    if token.isdigit():
+        return token
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            if suffix == "s" and token.endswith("ss"):
+                continue
+            token = token[:-len(suffix)]
+            break
+    if token.endswith("e") and len(token) > MIN_STEM_LENGTH:
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    BM25 index over the clauses of one document.
+    Built once; each search only touches the postings of the query's terms.
+    """
+
+    def __init__(self, clauses: List[str]):
+        self.clauses = clauses
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+
+        for i, clause in enumerate(clauses):
+            counts = Counter(tokenize(clause))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((i, tf))
+
+        n = len(clauses)
+        self._avg_length = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Return up to top_k (clause index, score) pairs, best first.
+        Clauses that share no terms with the query are never returned.
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self._postings[term]:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[i] / self._avg_length)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
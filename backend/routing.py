@@ -0,0 +1,85 @@
+import os
+from dataclasses import dataclass
+
+from segmenter import split_clauses
+
+# Gemini averages ~4 characters per token on English prose; legal text runs slightly denser
+CHARS_PER_TOKEN = 4.0
+TOKENS_PER_WORD = 1.33
+
+# Output size of a filled-in analysis: fixed schema plus a little per clause (risk flags, unusual clauses)
+BASE_OUTPUT_TOKENS = 900
+OUTPUT_TOKENS_PER_CLAUSE = 12
+MAX_OUTPUT_TOKENS = 8192
+
+# Size tiers (in estimated input tokens)
+SMALL_DOC_TOKENS = 4_000
+MAX_SINGLE_PASS_TOKENS = 20_000    # ~80,000 characters, the old truncation limit
+MAX_CHUNKS = 16
+
+# Contracts with more clauses than this go to the larger model even when they fit in one pass
+COMPLEX_CLAUSE_COUNT = 80
+
+
+@dataclass
+class Route:
+    model_name: str
+    max_output_tokens: int
+    strategy: str                  # "single" or "chunked"
+    chunk_tokens: int
+    estimated_input_tokens: int
+    estimated_output_tokens: int
+    clause_count: int
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate; no tokenizer or network call.
+    Takes the larger of a character-based and a word-based estimate.
+    """
+    if not text:
+        return 0
+    by_chars = len(text) / CHARS_PER_TOKEN
+    by_words = text.count(" ") * TOKENS_PER_WORD
+    return int(max(by_chars, by_words)) + 1
+
+
+def choose_route(contract_text: str) -> Route:
+    """
+    Pick the model, output budget and chunking strategy for a contract from its size and complexity.
+    """
+    # Read at call-time so .env changes don't require a server restart
+    default_model = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    large_model = os.getenv("GEMINI_MODEL_LARGE", default_model)
+
+    input_tokens = estimate_tokens(contract_text)
+    clause_count = len(split_clauses(contract_text))
+    output_tokens = BASE_OUTPUT_TOKENS + OUTPUT_TOKENS_PER_CLAUSE * clause_count
+
+    if input_tokens <= SMALL_DOC_TOKENS:
+        model_name, strategy = default_model, "single"
+    elif input_tokens <= MAX_SINGLE_PASS_TOKENS:
+        model_name = large_model if clause_count > COMPLEX_CLAUSE_COUNT else default_model
+        strategy = "single"
+    else:
+        model_name, strategy = large_model, "chunked"
+
+    if strategy == "chunked":
+        # Each chunk produces its own partial analysis
+        chunks = min(MAX_CHUNKS, -(-input_tokens // MAX_SINGLE_PASS_TOKENS))
+        per_chunk_output = BASE_OUTPUT_TOKENS + OUTPUT_TOKENS_PER_CLAUSE * (clause_count // chunks)
+        max_output = min(MAX_OUTPUT_TOKENS, int(per_chunk_output * 1.5))
+        output_tokens = per_chunk_output * chunks
+    else:
+        # Leave headroom over the estimate so long analyses are not cut off mid-JSON
+        max_output = min(MAX_OUTPUT_TOKENS, max(2048, int(output_tokens * 1.5)))
+
+    return Route(
+        model_name=model_name,
+        max_output_tokens=max_output,
+        strategy=strategy,
+        chunk_tokens=MAX_SINGLE_PASS_TOKENS,
+        estimated_input_tokens=input_tokens,
+        estimated_output_tokens=output_tokens,
+        clause_count=clause_count,
+    )
@@ -0,0 +1,54 @@
+import re
+from typing import List
+
+# Lines that start a new clause: "1.", "1.1", "12.3.4)", "(a)", "Section 4", "ARTICLE IV", "SCHEDULE A"
+_HEADING_RE = re.compile(
+    r"^\s*(?:\d+(?:\.\d+)*[.)]?\s|\([a-z0-9]{1,3}\)\s|(?:section|article|clause|schedule|annex|exhibit)\s+[\w.]+)",
+    re.IGNORECASE,
+)
+
+# Fragments shorter than this (usually bare headings) are merged into the next clause
+MIN_CLAUSE_CHARS = 40
+
+
+def split_clauses(text: str) -> List[str]:
+    """
+    Split contract text into clauses using blank lines and numbered headings as boundaries.
+    Returns the clauses in document order with whitespace collapsed.
+    """
+    clauses = []
+    current: List[str] = []
+
+    def flush():
+        if current:
+            clause = " ".join(" ".join(current).split())
+            if clause:
+                clauses.append(clause)
+            current.clear()
+
+    for line in text.splitlines():
+        if not line.strip():
+            flush()
+            continue
+        if _HEADING_RE.match(line):
+            flush()
+        current.append(line.strip())
+    flush()
+
+    # Fold short fragments forward so headings stay attached to their body text
+    merged: List[str] = []
+    carry = ""
+    for clause in clauses:
+        clause = f"{carry} {clause}".strip() if carry else clause
+        if len(clause) < MIN_CLAUSE_CHARS:
+            carry = clause
+            continue
+        merged.append(clause)
+        carry = ""
+    if carry:
+        if merged:
+            merged[-1] = f"{merged[-1]} {carry}"
+        else:
+            merged.append(carry)
+
+    return merged
@@ -0,0 +1,166 @@
+import re
+import hashlib
+import heapq
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from models import ContractAnalysis
+from segmenter import split_clauses
+
+# Word n-gram size used for shingling and number of minimum hashes kept per document
+SHINGLE_SIZE = 5
+SKETCH_SIZE = 128
+
+# Only the contracts sharing the most minimum hashes are scored exactly
+MAX_CANDIDATES = 10
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_DIGIT_RE = re.compile(r"\d")
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _shingle_tokens(text: str) -> List[str]:
+    # Digits are masked so templates that only differ in dates/amounts still shingle identically
+    return _TOKEN_RE.findall(_DIGIT_RE.sub("0", text.lower()))
+
+
+def clause_fingerprint(clause: str) -> int:
+    """Exact (case/whitespace-insensitive) fingerprint used to find clauses that changed."""
+    return _hash64(" ".join(clause.lower().split()))
+
+
+def minhash_sketch(clauses: List[str]) -> List[int]:
+    """
+    Bottom-k MinHash sketch: the SKETCH_SIZE smallest shingle hashes of the document.
+    Each shingle is hashed once, so this stays linear in document length.
+    """
+    hashes: Set[int] = set()
+    for clause in clauses:
+        tokens = _shingle_tokens(clause)
+        if len(tokens) < SHINGLE_SIZE:
+            if tokens:
+                hashes.add(_hash64(" ".join(tokens)))
+            continue
+        for i in range(len(tokens) - SHINGLE_SIZE + 1):
+            hashes.add(_hash64(" ".join(tokens[i:i + SHINGLE_SIZE])))
+    return sorted(heapq.nsmallest(SKETCH_SIZE, hashes))
+
+
+def estimate_jaccard(sketch_a: List[int], sketch_b: List[int]) -> float:
+    """Estimate Jaccard similarity of two documents from their bottom-k sketches."""
+    if not sketch_a or not sketch_b:
+        return 0.0
+    set_a, set_b = set(sketch_a), set(sketch_b)
+    union = sorted(set_a | set_b)[:SKETCH_SIZE]
+    return len((set_a & set_b).intersection(union)) / len(union)
+
+
+@dataclass
+class IndexedContract:
+    contract_id: str
+    sketch: List[int]
+    # Fingerprints only; the clause text itself lives in the document store / journal
+    clause_fingerprints: Set[int]
+    analysis: ContractAnalysis
+
+
+@dataclass
+class SimilarityMatch:
+    contract_id: str
+    similarity: float
+    analysis: ContractAnalysis
+    # Clauses of the new text missing from the match
+    changed_clauses: List[str] = field(default_factory=list)
+    # Fingerprints of the match's clauses missing from the new text; see clauses_with_fingerprints()
+    removed_fingerprints: Set[int] = field(default_factory=set)
+
+
+class SimilarityIndex:
+    """
+    In-memory near-duplicate index over previously analyzed contracts.
+    An inverted index from sketch hash -> contract ids narrows lookups to contracts that
+    share at least one minimum hash, so finding the nearest match does not scan everything.
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, IndexedContract]" = OrderedDict()
+        self._postings: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, contract_id: str, contract_text: str, analysis: ContractAnalysis) -> None:
+        clauses = split_clauses(contract_text)
+        entry = IndexedContract(
+            contract_id=contract_id,
+            sketch=minhash_sketch(clauses),
+            clause_fingerprints={clause_fingerprint(c) for c in clauses},
+            analysis=analysis,
+        )
+        with self._lock:
+            if contract_id in self._entries:
+                self._remove(contract_id)
+            self._entries[contract_id] = entry
+            for h in entry.sketch:
+                self._postings.setdefault(h, set()).add(contract_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, contract_id: str) -> None:
+        entry = self._entries.pop(contract_id)
+        for h in entry.sketch:
+            ids = self._postings.get(h)
+            if ids:
+                ids.discard(contract_id)
+                if not ids:
+                    del self._postings[h]
+
+    def find_nearest(
+        self, contract_text: str, min_similarity: float = 0.5, exclude_id: Optional[str] = None
+    ) -> Optional[SimilarityMatch]:
+        """
+        Return the most similar indexed contract other than exclude_id, or None if nothing
+        reaches min_similarity. The match lists the clauses of the new text that do not appear
+        verbatim in it, and the fingerprints of its clauses the new text no longer contains.
+        """
+        clauses = split_clauses(contract_text)
+        sketch = minhash_sketch(clauses)
+
+        with self._lock:
+            # Rank candidates by how many minimum hashes they share, then score only the best few
+            shared: Counter = Counter()
+            for h in sketch:
+                shared.update(self._postings.get(h, ()))
+            shared.pop(exclude_id, None)
+
+            best: Optional[IndexedContract] = None
+            best_score = 0.0
+            for contract_id, _ in shared.most_common(MAX_CANDIDATES):
+                entry = self._entries[contract_id]
+                score = estimate_jaccard(sketch, entry.sketch)
+                if score > best_score:
+                    best, best_score = entry, score
+
+        if best is None or best_score < min_similarity:
+            return None
+
+        fingerprints = {clause_fingerprint(c): c for c in clauses}
+        return SimilarityMatch(
+            contract_id=best.contract_id,
+            similarity=round(best_score, 4),
+            analysis=best.analysis,
+            changed_clauses=[c for f, c in fingerprints.items() if f not in best.clause_fingerprints],
+            removed_fingerprints=best.clause_fingerprints - fingerprints.keys(),
+        )
+
+
+def clauses_with_fingerprints(contract_text: str, fingerprints: Set[int]) -> List[str]:
+    """The clauses of a contract whose fingerprints are given, in document order."""
+    return [c for c in split_clauses(contract_text) if clause_fingerprint(c) in fingerprints]
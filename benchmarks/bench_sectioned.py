@@ -0,0 +1,61 @@
+"""
+Wall-clock latency of monolithic vs. sectioned analysis.
+
+Gemini is replaced by the fake model in fake_llm.py, whose latency grows with output length,
+so the sectioned requests' shorter responses show up as lower wall-clock time.
+
+Usage (from the repo root):
+    python benchmarks/bench_sectioned.py [--runs 3] [--ms-per-output-token 8]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import analyzer  # noqa: E402
+from bench_serialization import sample_contract  # noqa: E402
+from fake_llm import install_fake_model  # noqa: E402
+
+
+def measure(fn, contract_text: str, runs: int) -> dict:
+    latencies, usage = [], {}
+    for _ in range(runs):
+        started = time.perf_counter()
+        _, usage = fn(contract_text)
+        latencies.append(time.perf_counter() - started)
+    return {
+        "median_s": statistics.median(latencies),
+        "calls": usage["calls"],
+        "input_tokens": usage["actual_input_tokens"],
+        "output_tokens": usage["actual_output_tokens"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--ttft-ms", type=float, default=400)
+    parser.add_argument("--ms-per-input-token", type=float, default=0.02)
+    parser.add_argument("--ms-per-output-token", type=float, default=8)
+    args = parser.parse_args()
+
+    install_fake_model(args.ttft_ms, args.ms_per_input_token, args.ms_per_output_token)
+    contract_text = sample_contract()
+
+    results = {
+        "monolithic": measure(analyzer.analyze_contract, contract_text, args.runs),
+        "sectioned": measure(analyzer.analyze_contract_sectioned, contract_text, args.runs),
+    }
+
+    print(f"{'mode':<12}{'median s':>10}{'calls':>8}{'input tok':>12}{'output tok':>12}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['median_s']:>10.2f}{r['calls']:>8}{r['input_tokens']:>12}{r['output_tokens']:>12}")
+    speedup = results["monolithic"]["median_s"] / results["sectioned"]["median_s"]
+    print(f"sectioned wall-clock speed-up: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
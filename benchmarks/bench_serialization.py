@@ -0,0 +1,136 @@
+"""
+Per-request cost of turning a model response into an HTTP body.
+
+Compares the original path (str.format prompt, json.loads -> ContractAnalysis(**dict),
+FastAPI response_model re-validation + jsonable_encoder + json.dumps) with the current one
+(prompt concatenation, model_validate_json on the raw text, FastJSONResponse).
+No network calls are made.
+
+Usage (from the repo root):
+    python benchmarks/bench_serialization.py [--requests 2000]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from analyzer import ANALYSIS_PROMPT_TEMPLATE, build_analysis_prompt, parse_analysis  # noqa: E402
+from models import AnalyzeResponse, ContractAnalysis  # noqa: E402
+from responses import FastJSONResponse  # noqa: E402
+
+CONTRACT_CHARS = 80_000
+
+
+def sample_contract() -> str:
+    clause = (
+        "The Service Provider shall deliver the Services in accordance with the Statement of Work "
+        "and shall invoice the Client monthly. Either party may terminate this Agreement on thirty (30) "
+        "days written notice. Liability is capped at fees paid in the preceding twelve (12) months.\n\n"
+    )
+    return (clause * (CONTRACT_CHARS // len(clause) + 1))[:CONTRACT_CHARS]
+
+
+def sample_model_response() -> str:
+    flag = {
+        "category": "Liability Risk",
+        "risk_level": "Medium",
+        "reason": "Cap excludes indemnities and data breaches, leaving material exposure uncapped.",
+        "clause_reference": "Section 12.3",
+    }
+    analysis = {
+        "plain_english_summary": "A master services agreement for managed IT services. " * 8,
+        "key_parties": {"party_1": "Acme Corp", "party_2": "Globex Ltd", "other_parties": ["Initech"]},
+        "contract_duration": {
+            "start_date": "January 1, 2024", "end_date": "December 31, 2026",
+            "renewal_terms": "Renews for successive one-year terms", "auto_renewal": "Yes",
+        },
+        "payment_terms": {
+            "amounts": "USD 25,000 per month", "payment_schedule": "Monthly in arrears",
+            "late_fees": "1.5% per month", "refund_policy": "Not specified",
+        },
+        "termination_clauses": {
+            "termination_for_convenience": "Either party on 90 days notice",
+            "termination_for_cause": "Material breach uncured within 30 days",
+            "notice_period": "90 days", "exit_conditions": "Transition assistance for 60 days",
+        },
+        "confidentiality_terms": "Mutual, surviving five years after termination.",
+        "intellectual_property_terms": "Provider retains pre-existing IP; deliverables assigned to Client.",
+        "liability_and_indemnity": {
+            "liability_cap": "Fees paid in the preceding 12 months",
+            "indemnification_clause": "Provider indemnifies against third-party IP claims.",
+        },
+        "risk_flags": [dict(flag, category=c) for c in (
+            "Auto-Renewal Risk", "Liability Risk", "Exit Risk", "Payment Risk", "IP Risk"
+        )],
+        "unusual_or_risky_clauses": [
+            {"clause": "Provider may change fees on 30 days notice", "why_it_is_risky": "Unilateral pricing."}
+        ] * 4,
+    }
+    return json.dumps(analysis, indent=2)
+
+
+def legacy_request(contract_text: str, raw_response: str) -> bytes:
+    ANALYSIS_PROMPT_TEMPLATE.format(contract_text=contract_text)
+    analysis = ContractAnalysis(**json.loads(raw_response))
+    response = AnalyzeResponse(success=True, analysis=analysis)
+    # What FastAPI does with a returned model and response_model set: dump, re-validate,
+    # encode to a JSON-compatible dict, then json.dumps in JSONResponse
+    validated = AnalyzeResponse.model_validate(response.model_dump())
+    content = validated.model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def current_request(contract_text: str, raw_response: str) -> bytes:
+    build_analysis_prompt(contract_text)
+    analysis = parse_analysis(raw_response)
+    return FastJSONResponse(AnalyzeResponse(success=True, analysis=analysis)).body
+
+
+def measure(fn, contract_text: str, raw_response: str, requests: int) -> dict:
+    fn(contract_text, raw_response)  # warm-up
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        fn(contract_text, raw_response)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn(contract_text, raw_response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "us_per_request": elapsed / requests * 1e6,
+        "requests_per_s": requests / elapsed,
+        "peak_kb": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    contract_text = sample_contract()
+    raw_response = sample_model_response()
+
+    # Both paths must produce the same payload
+    assert json.loads(legacy_request(contract_text, raw_response)) == json.loads(current_request(contract_text, raw_response))
+
+    legacy = measure(legacy_request, contract_text, raw_response, args.requests)
+    current = measure(current_request, contract_text, raw_response, args.requests)
+
+    print(f"{'path':<10}{'us/request':>14}{'requests/s':>14}{'peak KB':>12}")
+    for name, result in (("legacy", legacy), ("current", current)):
+        print(f"{name:<10}{result['us_per_request']:>14.1f}{result['requests_per_s']:>14.0f}{result['peak_kb']:>12.1f}")
+    print(f"speed-up: {legacy['us_per_request'] / current['us_per_request']:.2f}x, "
+          f"peak memory: {current['peak_kb'] / legacy['peak_kb']:.0%} of legacy")
+
+
+if __name__ == "__main__":
+    main()
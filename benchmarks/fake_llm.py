@@ -0,0 +1,75 @@
+"""
+Stand-in for Gemini used by the benchmarks and load test.
+
+Latency follows the usual shape of LLM calls: a fixed time-to-first-token, plus time per
+input token (prefill) and per output token (generation). The response is the benchmark
+analysis restricted to the keys each prompt asks for, so shorter schemas generate shorter
+responses. Errors can be injected at a fixed rate to exercise the failure paths.
+"""
+import os
+import sys
+import json
+import time
+import types
+import random
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import analyzer  # noqa: E402
+from bench_serialization import sample_model_response  # noqa: E402
+
+CHARS_PER_TOKEN = 4
+
+
+class InjectedModelError(Exception):
+    pass
+
+
+def install_fake_model(
+    ttft_ms: float = 400,
+    ms_per_input_token: float = 0.02,
+    ms_per_output_token: float = 8,
+    error_rate: float = 0.0,
+    jitter: float = 0.0,
+    seed: int = 0,
+) -> None:
+    """
+    Replace the Gemini client used by analyzer with the fake model.
+    jitter is the +/- fraction applied to each call's latency.
+    """
+    full_analysis = json.loads(sample_model_response())
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class FakeModel:
+        def __init__(self, model_name=None, system_instruction=None, generation_config=None):
+            pass
+
+        def generate_content(self, prompt: str):
+            with rng_lock:
+                fail = rng.random() < error_rate
+                scale = 1 + rng.uniform(-jitter, jitter)
+
+            schema = prompt.split("CONTRACT", 1)[0]
+            answer = json.dumps({k: v for k, v in full_analysis.items() if f'"{k}"' in schema})
+            input_tokens = len(prompt) // CHARS_PER_TOKEN
+            output_tokens = len(answer) // CHARS_PER_TOKEN
+            latency_ms = ttft_ms + input_tokens * ms_per_input_token + output_tokens * ms_per_output_token
+
+            if fail:
+                # Providers usually fail fast, before generating
+                time.sleep(ttft_ms * scale / 1000)
+                raise InjectedModelError("503 injected by fake model")
+
+            time.sleep(latency_ms * scale / 1000)
+            return types.SimpleNamespace(
+                text=answer,
+                usage_metadata=types.SimpleNamespace(
+                    prompt_token_count=input_tokens, candidates_token_count=output_tokens
+                ),
+            )
+
+    analyzer.genai.configure = lambda **kwargs: None
+    analyzer.genai.GenerativeModel = FakeModel
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
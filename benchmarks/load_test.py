@@ -0,0 +1,298 @@
+"""
+Load test and capacity report for the FastAPI backend.
+
+Starts backend/main.py in-process under uvicorn with Gemini replaced by the fake model
+(fake_llm.py), then drives /analyze/text and /analyze/pdf from an async client at
+increasing concurrency with a mix of document sizes. For each concurrency level it reports
+throughput, latency percentiles, error rate and process memory, and picks out the
+saturation point. Threshold flags turn it into a regression gate (non-zero exit on failure).
+
+Usage (from the repo root):
+    python benchmarks/load_test.py --concurrency 1,4,16,32 --duration 10
+    python benchmarks/load_test.py --min-throughput 5 --max-p95-ms 8000 --max-error-rate 0.02
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import fitz  # noqa: E402
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from fake_llm import install_fake_model  # noqa: E402
+
+# name -> (approximate characters, share of requests)
+DOCUMENT_MIX = {
+    "nda": (3_000, 0.40),
+    "services": (25_000, 0.35),
+    "msa": (80_000, 0.20),
+    "enterprise": (200_000, 0.05),
+}
+
+CLAUSES = [
+    "The Provider shall deliver the Services described in each Statement of Work with reasonable skill and care.",
+    "The Client shall pay all undisputed invoices within thirty (30) days of receipt. Late payments accrue interest at 1.5% per month.",
+    "Either party may terminate this Agreement for convenience on ninety (90) days written notice to the other party.",
+    "Either party may terminate this Agreement for cause if the other party commits a material breach that remains uncured for thirty (30) days.",
+    "Each party's aggregate liability is limited to the fees paid in the twelve (12) months preceding the claim.",
+    "The Provider shall indemnify the Client against third-party claims that the Deliverables infringe intellectual property rights.",
+    "Each party shall keep the other party's Confidential Information confidential for five (5) years after termination.",
+    "This Agreement renews automatically for successive one-year terms unless either party gives notice of non-renewal.",
+]
+
+
+def make_contract(target_chars: int, rng: random.Random) -> str:
+    # Party names vary per document so repeated requests are not identical
+    parts = [
+        f"MASTER SERVICES AGREEMENT\n\nThis Agreement is entered into between Provider {rng.randint(1, 10**6)} "
+        f"and Client {rng.randint(1, 10**6)}, effective January {rng.randint(1, 28)}, 2025."
+    ]
+    size, number = len(parts[0]), 1
+    while size < target_chars:
+        clause = f"{number}. {rng.choice(CLAUSES)} {rng.choice(CLAUSES)}"
+        parts.append(clause)
+        size += len(clause) + 2
+        number += 1
+    return "\n\n".join(parts)
+
+
+def make_pdf(text: str) -> bytes:
+    doc = fitz.open()
+    lines = text.splitlines()
+    for start in range(0, len(lines), 40):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), "\n".join(lines[start:start + 40]), fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@dataclass
+class RequestResult:
+    endpoint: str
+    document: str
+    status: int
+    latency_ms: float
+    error: str = ""
+
+
+@dataclass
+class LevelReport:
+    concurrency: int
+    requests: int
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    error_rate: float
+    rss_mb: float
+    errors: Dict[str, int] = field(default_factory=dict)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process (server and client share it)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current RSS, but still shows growth; ru_maxrss is KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def start_server() -> Tuple[uvicorn.Server, str]:
+    import main
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+class Workload:
+    """Pre-generated documents, sampled by DOCUMENT_MIX weights."""
+
+    def __init__(self, pdf_ratio: float, variants: int, seed: int):
+        rng = random.Random(seed)
+        self.rng = rng
+        self.pdf_ratio = pdf_ratio
+        self.names = list(DOCUMENT_MIX)
+        self.weights = [DOCUMENT_MIX[name][1] for name in self.names]
+        self.texts = {name: [make_contract(DOCUMENT_MIX[name][0], rng) for _ in range(variants)] for name in self.names}
+        self.pdfs = {name: [make_pdf(text) for text in texts] for name, texts in self.texts.items()}
+        self.sent = 0
+
+    def next_request(self) -> Tuple[str, str, dict]:
+        name = self.rng.choices(self.names, self.weights)[0]
+        i = self.rng.randrange(len(self.texts[name]))
+        # Make every request distinct, so the journal never answers one from an identical earlier request
+        self.sent += 1
+        if self.rng.random() < self.pdf_ratio:
+            # Trailing PDF comment: changes the bytes, not the extracted text
+            pdf = self.pdfs[name][i] + f"\n% request {self.sent}\n".encode()
+            return "/analyze/pdf", name, {"files": {"file": (f"{name}.pdf", pdf, "application/pdf")}}
+        text = f"{self.texts[name][i]}\n\nReference: load test request {self.sent}."
+        return "/analyze/text", name, {"json": {"contract_text": text}}
+
+
+async def run_level(base_url: str, workload: Workload, concurrency: int, duration: float, timeout: float) -> List[RequestResult]:
+    """Closed-loop load: `concurrency` workers each send a new request as soon as the last one finishes."""
+    results: List[RequestResult] = []
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                endpoint, document, kwargs = workload.next_request()
+                started = time.perf_counter()
+                try:
+                    response = await client.post(endpoint, **kwargs)
+                    status = response.status_code
+                    error = "" if status == 200 else f"HTTP {status}"
+                except httpx.HTTPError as e:
+                    status, error = 0, type(e).__name__
+                results.append(RequestResult(endpoint, document, status, (time.perf_counter() - started) * 1000, error))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def summarize(concurrency: int, results: List[RequestResult], elapsed: float) -> LevelReport:
+    latencies = [r.latency_ms for r in results if not r.error]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r.error:
+            errors[r.error] = errors.get(r.error, 0) + 1
+    return LevelReport(
+        concurrency=concurrency,
+        requests=len(results),
+        throughput_rps=len(latencies) / elapsed if elapsed else 0.0,
+        p50_ms=percentile(latencies, 50),
+        p95_ms=percentile(latencies, 95),
+        p99_ms=percentile(latencies, 99),
+        error_rate=(len(results) - len(latencies)) / len(results) if results else 0.0,
+        rss_mb=rss_mb(),
+        errors=errors,
+    )
+
+
+def find_saturation(levels: List[LevelReport]) -> Optional[LevelReport]:
+    """The lowest concurrency that reaches 95% of the best observed throughput."""
+    if not levels:
+        return None
+    best = max(level.throughput_rps for level in levels)
+    return next(level for level in levels if level.throughput_rps >= 0.95 * best)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per concurrency level")
+    parser.add_argument("--pdf-ratio", type=float, default=0.3, help="Share of requests sent as PDF uploads")
+    parser.add_argument("--variants", type=int, default=5, help="Distinct documents generated per size class")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ttft-ms", type=float, default=400, help="Fake model time to first token")
+    parser.add_argument("--ms-per-input-token", type=float, default=0.02)
+    parser.add_argument("--ms-per-output-token", type=float, default=8)
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction applied to fake model latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake model calls that fail")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path")
+    parser.add_argument("--min-throughput", type=float, help="Gate: saturation throughput must be at least this (req/s)")
+    parser.add_argument("--max-p95-ms", type=float, help="Gate: p95 latency at every level must be at most this")
+    parser.add_argument("--max-error-rate", type=float, help="Gate: error rate at every level must be at most this")
+    parser.add_argument("--max-memory-growth-mb", type=float, help="Gate: RSS growth over the run must be at most this")
+    args = parser.parse_args()
+
+    install_fake_model(
+        ttft_ms=args.ttft_ms,
+        ms_per_input_token=args.ms_per_input_token,
+        ms_per_output_token=args.ms_per_output_token,
+        error_rate=args.error_rate,
+        jitter=args.jitter,
+        seed=args.seed,
+    )
+    workload = Workload(args.pdf_ratio, args.variants, args.seed)
+    # A throwaway request journal, so the run neither litters nor resumes real jobs
+    journal_dir = tempfile.mkdtemp(prefix="contractbot-journal-")
+    os.environ["JOURNAL_DIR"] = journal_dir
+    server, base_url = start_server()
+    baseline_rss = rss_mb()
+
+    levels: List[LevelReport] = []
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            started = time.perf_counter()
+            results = asyncio.run(run_level(base_url, workload, concurrency, args.duration, args.timeout))
+            levels.append(summarize(concurrency, results, time.perf_counter() - started))
+            level = levels[-1]
+            print(f"concurrency {concurrency:>3}: {level.throughput_rps:6.2f} req/s  "
+                  f"p95 {level.p95_ms:8.0f} ms  errors {level.error_rate:6.1%}", flush=True)
+    finally:
+        server.should_exit = True
+        shutil.rmtree(journal_dir, ignore_errors=True)
+
+    saturation = find_saturation(levels)
+    memory_growth = levels[-1].rss_mb - baseline_rss if levels else 0.0
+
+    print()
+    print(f"{'conc':>5}{'requests':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>9}{'RSS MB':>9}")
+    for level in levels:
+        print(f"{level.concurrency:>5}{level.requests:>10}{level.throughput_rps:>9.2f}{level.p50_ms:>9.0f}"
+              f"{level.p95_ms:>9.0f}{level.p99_ms:>9.0f}{level.error_rate:>9.1%}{level.rss_mb:>9.1f}")
+    if saturation:
+        print(f"\nsaturation: {saturation.throughput_rps:.2f} req/s at concurrency {saturation.concurrency}")
+    print(f"memory growth: {memory_growth:+.1f} MB (baseline {baseline_rss:.1f} MB)")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "settings": vars(args),
+                "levels": [asdict(level) for level in levels],
+                "saturation": asdict(saturation) if saturation else None,
+                "memory_growth_mb": memory_growth,
+            }, f, indent=2)
+
+    failures = []
+    if args.min_throughput is not None and (not saturation or saturation.throughput_rps < args.min_throughput):
+        failures.append(f"saturation throughput below {args.min_throughput} req/s")
+    if args.max_p95_ms is not None and any(level.p95_ms > args.max_p95_ms for level in levels):
+        failures.append(f"p95 latency above {args.max_p95_ms} ms")
+    if args.max_error_rate is not None and any(level.error_rate > args.max_error_rate for level in levels):
+        failures.append(f"error rate above {args.max_error_rate:.1%}")
+    if args.max_memory_growth_mb is not None and memory_growth > args.max_memory_growth_mb:
+        failures.append(f"memory growth above {args.max_memory_growth_mb} MB")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
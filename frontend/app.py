@@ -1,5 +1,7 @@
 import streamlit as st
 import requests
+import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # ── Page Config ──────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -192,6 +194,9 @@ st.markdown("""
 
 BACKEND_URL = "http://localhost:8000"
 
+# Files analyzed concurrently in a batch upload; keeps a deal room from flooding the backend
+MAX_PARALLEL_UPLOADS = 4
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
@@ -228,163 +233,28 @@ def card(title: str, content: str) -> str:
     </div>'''
 
 
-def call_analyze_text(contract_text: str) -> dict:
+def call_analyze_text(contract_text: str, mode: str = "monolithic") -> dict:
     response = requests.post(
         f"{BACKEND_URL}/analyze/text",
-        json={"contract_text": contract_text},
+        json={"contract_text": contract_text, "mode": mode},
         timeout=120
     )
     response.raise_for_status()
     return response.json()
 
 
-def call_analyze_pdf(pdf_bytes: bytes, filename: str) -> dict:
+def call_analyze_pdf(pdf_bytes: bytes, filename: str, mode: str = "monolithic") -> dict:
     response = requests.post(
         f"{BACKEND_URL}/analyze/pdf",
         files={"file": (filename, pdf_bytes, "application/pdf")},
+        data={"mode": mode},
         timeout=120
     )
     response.raise_for_status()
     return response.json()
 
 
-# ── Sidebar ───────────────────────────────────────────────────────────────────
-
-with st.sidebar:
-    st.markdown("""
-    <div style="text-align:center; padding: 20px 0 10px;">
-        <div style="font-size:48px;">📄</div>
-        <div style="font-size:22px; font-weight:700; color:#818cf8; margin-top:8px;">ContractBot</div>
-        <div style="font-size:12px; color:#475569; margin-top:4px;">AI Contract Analyzer</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("---")
-
-    st.markdown("""
-    <div style="color:#94a3b8; font-size:13px; line-height:1.8;">
-    <b style="color:#818cf8;">How it works</b><br><br>
-    1️⃣ &nbsp;Upload a PDF <b>or</b> paste your contract text<br><br>
-    2️⃣ &nbsp;Click <b>Analyze Contract</b><br><br>
-    3️⃣ &nbsp;Review the structured analysis, risk flags, and unusual clauses<br><br>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("---")
-
-    st.markdown("""
-    <div style="color:#475569; font-size:12px; line-height:1.6;">
-    <b style="color:#64748b;">Powered by</b><br>
-    🤖 Gemini AI (Google)<br>
-    📑 PyMuPDF (PDF Parsing)<br>
-    ⚡ FastAPI Backend<br>
-    🎈 Streamlit Frontend
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown("---")
-    st.markdown("""
-    <div style="color:#ef4444; font-size:11px; line-height:1.5;">
-    ⚠️ <b>Disclaimer:</b> This tool is for informational purposes only and does not constitute legal advice. Always consult a qualified legal professional for binding decisions.
-    </div>
-    """, unsafe_allow_html=True)
-
-
-# ── Main Header ───────────────────────────────────────────────────────────────
-
-st.markdown("""
-<div class="main-header">
-    <h1>📄 ContractBot</h1>
-    <p>Instant AI-powered contract analysis — understand risks, terms, and obligations in seconds</p>
-</div>
-""", unsafe_allow_html=True)
-
-
-# ── Input Section ─────────────────────────────────────────────────────────────
-
-# Initialize session state
-if "contract_text" not in st.session_state:
-    st.session_state.contract_text = ""
-if "analysis_result" not in st.session_state:
-    st.session_state.analysis_result = None
-
-tab_text, tab_pdf = st.tabs(["📝 Paste Contract Text", "📂 Upload PDF"])
-
-contract_text_input = None
-pdf_file = None
-
-with tab_text:
-    st.markdown(
-        '<p style="color:#64748b; font-size:13px; margin-bottom:6px;">Paste the full contract text below</p>',
-        unsafe_allow_html=True
-    )
-    contract_text_input = st.text_area(
-        label="Contract Text",
-        placeholder="Paste your contract text here...\n\nExample: SERVICE AGREEMENT\nThis Agreement is entered into...",
-        height=280,
-        label_visibility="collapsed",
-        key="contract_text"  # persists across re-runs via session_state
-    )
-
-with tab_pdf:
-    st.markdown(
-        '<p style="color:#64748b; font-size:13px; margin-bottom:6px;">Upload a PDF contract file</p>',
-        unsafe_allow_html=True
-    )
-    pdf_file = st.file_uploader(
-        "Upload Contract PDF",
-        type=["pdf"],
-        label_visibility="collapsed"
-    )
-    if pdf_file:
-        st.success(f"✅ File loaded: **{pdf_file.name}** ({pdf_file.size:,} bytes)")
-
-st.markdown("<br>", unsafe_allow_html=True)
-analyze_clicked = st.button("🔍 Analyze Contract", use_container_width=True)
-
-
-# ── Analysis ──────────────────────────────────────────────────────────────────
-
-if analyze_clicked:
-    # Read from session_state in case widget value was not updated this run
-    active_text = st.session_state.get("contract_text", "") or ""
-    has_text = len(active_text.strip()) > 50
-    has_pdf = pdf_file is not None
-
-    if not has_text and not has_pdf:
-        st.error("⚠️ Please paste contract text or upload a PDF before analyzing.")
-        st.stop()
-
-    with st.spinner("🤖 Claude is reviewing your contract... This may take 15–30 seconds."):
-        try:
-            if has_pdf:
-                result = call_analyze_pdf(pdf_file.read(), pdf_file.name)
-            else:
-                result = call_analyze_text(active_text)
-        except requests.exceptions.ConnectionError:
-            st.error(
-                "❌ **Cannot connect to the backend.**\n\n"
-                "Make sure the FastAPI server is running:\n"
-                "```\ncd backend\nuvicorn main:app --reload --port 8000\n```"
-            )
-            st.stop()
-        except requests.exceptions.HTTPError as e:
-            try:
-                detail = e.response.json().get("detail", str(e))
-            except Exception:
-                detail = str(e)
-            st.error(f"❌ **Backend error:** {detail}")
-            st.stop()
-        except Exception as e:
-            st.error(f"❌ **Unexpected error:** {str(e)}")
-            st.stop()
-
-    if not result.get("success"):
-        st.error(f"❌ Analysis failed: {result.get('error', 'Unknown error')}")
-        st.stop()
-
-    analysis = result.get("analysis", {})
-
+def render_analysis(analysis: dict) -> None:
     st.markdown("---")
     st.markdown(
         '<h2 style="color:#818cf8; font-size:22px; font-weight:700; margin-bottom:16px;">📊 Contract Analysis</h2>',
@@ -523,3 +393,273 @@ if analyze_clicked:
         '</p>',
         unsafe_allow_html=True
     )
+
+
+def describe_error(error: Exception) -> str:
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "Cannot connect to the backend"
+    if isinstance(error, requests.exceptions.HTTPError):
+        try:
+            return error.response.json().get("detail", str(error))
+        except Exception:
+            return str(error)
+    return str(error)
+
+
+def highest_risk(risk_flags: list) -> str:
+    levels = {str(f.get("risk_level", "")).strip().lower() for f in risk_flags}
+    for level in ("high", "medium", "low"):
+        if level in levels:
+            return level.capitalize()
+    return "—"
+
+
+def analyze_batch(files: list, mode: str = "monolithic") -> list:
+    """
+    Send every uploaded PDF to the backend, at most MAX_PARALLEL_UPLOADS at a time,
+    showing a live status line per file. Returns one result entry per file, in upload order.
+    """
+    # Read in the script thread; UploadedFile objects are not safe to share across threads
+    uploads = [(f.name, f.getvalue()) for f in files]
+    results = [{"file": name, "result": None, "error": None} for name, _ in uploads]
+
+    st.markdown("---")
+    progress = st.progress(0.0, text=f"Analyzing {len(uploads)} contracts...")
+    status_lines = [st.empty() for _ in uploads]
+
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_UPLOADS) as pool:
+        pending = {pool.submit(call_analyze_pdf, data, name, mode): i for i, (name, data) in enumerate(uploads)}
+        done_count = 0
+        while pending:
+            # Poll so queued files can be shown switching to "analyzing" as workers free up
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    result = future.result()
+                    if result.get("success"):
+                        results[i]["result"] = result
+                    else:
+                        results[i]["error"] = result.get("error") or "Unknown error"
+                except Exception as e:
+                    results[i]["error"] = describe_error(e)
+                done_count += 1
+
+            for future, i in pending.items():
+                state = "🔄 Analyzing" if future.running() else "⏳ Queued"
+                status_lines[i].markdown(f"{state} — **{uploads[i][0]}**")
+            for i, entry in enumerate(results):
+                if entry["result"]:
+                    status_lines[i].markdown(f"✅ Done — **{entry['file']}**")
+                elif entry["error"]:
+                    status_lines[i].markdown(f"❌ Failed — **{entry['file']}**: {entry['error']}")
+
+            progress.progress(done_count / len(uploads), text=f"Analyzed {done_count} of {len(uploads)} contracts")
+
+    progress.empty()
+    for line in status_lines:
+        line.empty()
+    return results
+
+
+def render_batch_results(results: list) -> None:
+    st.markdown("---")
+    st.markdown(
+        '<h2 style="color:#818cf8; font-size:22px; font-weight:700; margin-bottom:16px;">📚 Portfolio Summary</h2>',
+        unsafe_allow_html=True
+    )
+
+    order = {"High": 0, "Medium": 1, "Low": 2}
+    rows = []
+    for entry in results:
+        result = entry["result"] or {}
+        analysis = result.get("analysis") or {}
+        flags = analysis.get("risk_flags", [])
+        levels = [str(f.get("risk_level", "")).strip().lower() for f in flags]
+        rows.append({
+            "File": entry["file"],
+            "Status": "✅ Analyzed" if entry["result"] else f"❌ {entry['error']}",
+            "Overall Risk": highest_risk(flags) if entry["result"] else "—",
+            "High": levels.count("high"),
+            "Medium": levels.count("medium"),
+            "Low": levels.count("low"),
+            "Playbook Deviations": len(result.get("playbook_deviations", [])),
+            "Summary": analysis.get("plain_english_summary", ""),
+        })
+
+    # Riskiest first; click any column header to re-sort
+    table = pd.DataFrame(rows)
+    table["_rank"] = table["Overall Risk"].map(order).fillna(3)
+    table = table.sort_values(["_rank", "High", "Medium"], ascending=[True, False, False]).drop(columns="_rank")
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
+    analyzed = [entry for entry in results if entry["result"]]
+    if not analyzed:
+        st.error("❌ None of the files could be analyzed.")
+        return
+
+    names = [entry["file"] for entry in analyzed]
+    selected = st.selectbox("🔎 Drill into a contract", range(len(names)), format_func=lambda i: names[i])
+    render_analysis(analyzed[selected]["result"].get("analysis", {}))
+
+
+# ── Sidebar ───────────────────────────────────────────────────────────────────
+
+with st.sidebar:
+    st.markdown("""
+    <div style="text-align:center; padding: 20px 0 10px;">
+        <div style="font-size:48px;">📄</div>
+        <div style="font-size:22px; font-weight:700; color:#818cf8; margin-top:8px;">ContractBot</div>
+        <div style="font-size:12px; color:#475569; margin-top:4px;">AI Contract Analyzer</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("---")
+
+    st.markdown("""
+    <div style="color:#94a3b8; font-size:13px; line-height:1.8;">
+    <b style="color:#818cf8;">How it works</b><br><br>
+    1️⃣ &nbsp;Upload one or more PDFs <b>or</b> paste your contract text<br><br>
+    2️⃣ &nbsp;Click <b>Analyze Contract</b><br><br>
+    3️⃣ &nbsp;Review the structured analysis, risk flags, and unusual clauses<br><br>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("---")
+
+    st.markdown("""
+    <div style="color:#475569; font-size:12px; line-height:1.6;">
+    <b style="color:#64748b;">Powered by</b><br>
+    🤖 Gemini AI (Google)<br>
+    📑 PyMuPDF (PDF Parsing)<br>
+    ⚡ FastAPI Backend<br>
+    🎈 Streamlit Frontend
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("---")
+    st.markdown("""
+    <div style="color:#ef4444; font-size:11px; line-height:1.5;">
+    ⚠️ <b>Disclaimer:</b> This tool is for informational purposes only and does not constitute legal advice. Always consult a qualified legal professional for binding decisions.
+    </div>
+    """, unsafe_allow_html=True)
+
+
+# ── Main Header ───────────────────────────────────────────────────────────────
+
+st.markdown("""
+<div class="main-header">
+    <h1>📄 ContractBot</h1>
+    <p>Instant AI-powered contract analysis — understand risks, terms, and obligations in seconds</p>
+</div>
+""", unsafe_allow_html=True)
+
+
+# ── Input Section ─────────────────────────────────────────────────────────────
+
+# Initialize session state
+if "contract_text" not in st.session_state:
+    st.session_state.contract_text = ""
+if "analysis_result" not in st.session_state:
+    st.session_state.analysis_result = None
+if "batch_results" not in st.session_state:
+    st.session_state.batch_results = []
+
+tab_text, tab_pdf = st.tabs(["📝 Paste Contract Text", "📂 Upload PDF"])
+
+contract_text_input = None
+pdf_file = None
+pdf_files = []
+
+with tab_text:
+    st.markdown(
+        '<p style="color:#64748b; font-size:13px; margin-bottom:6px;">Paste the full contract text below</p>',
+        unsafe_allow_html=True
+    )
+    contract_text_input = st.text_area(
+        label="Contract Text",
+        placeholder="Paste your contract text here...\n\nExample: SERVICE AGREEMENT\nThis Agreement is entered into...",
+        height=280,
+        label_visibility="collapsed",
+        key="contract_text"  # persists across re-runs via session_state
+    )
+
+with tab_pdf:
+    st.markdown(
+        '<p style="color:#64748b; font-size:13px; margin-bottom:6px;">Upload one or more PDF contract files</p>',
+        unsafe_allow_html=True
+    )
+    pdf_files = st.file_uploader(
+        "Upload Contract PDF",
+        type=["pdf"],
+        accept_multiple_files=True,
+        label_visibility="collapsed"
+    )
+    if len(pdf_files) == 1:
+        pdf_file = pdf_files[0]
+        st.success(f"✅ File loaded: **{pdf_file.name}** ({pdf_file.size:,} bytes)")
+    elif pdf_files:
+        total_size = sum(f.size for f in pdf_files)
+        st.success(f"✅ {len(pdf_files)} files loaded ({total_size:,} bytes) — they will be analyzed in parallel")
+
+st.markdown("<br>", unsafe_allow_html=True)
+fast_mode = st.toggle(
+    "⚡ Fast mode — analyze contract sections in parallel",
+    help="Sends several smaller requests at once instead of one long one. Usually much quicker on long contracts."
+)
+analysis_mode = "sectioned" if fast_mode else "monolithic"
+analyze_clicked = st.button("🔍 Analyze Contract", use_container_width=True)
+
+
+# ── Analysis ──────────────────────────────────────────────────────────────────
+
+if analyze_clicked and len(pdf_files) > 1:
+    st.session_state.batch_results = analyze_batch(pdf_files, analysis_mode)
+
+elif analyze_clicked:
+    st.session_state.batch_results = []
+
+    # Read from session_state in case widget value was not updated this run
+    active_text = st.session_state.get("contract_text", "") or ""
+    has_text = len(active_text.strip()) > 50
+    has_pdf = pdf_file is not None
+
+    if not has_text and not has_pdf:
+        st.error("⚠️ Please paste contract text or upload a PDF before analyzing.")
+        st.stop()
+
+    with st.spinner("🤖 Claude is reviewing your contract... This may take 15–30 seconds."):
+        try:
+            if has_pdf:
+                result = call_analyze_pdf(pdf_file.read(), pdf_file.name, analysis_mode)
+            else:
+                result = call_analyze_text(active_text, analysis_mode)
+        except requests.exceptions.ConnectionError:
+            st.error(
+                "❌ **Cannot connect to the backend.**\n\n"
+                "Make sure the FastAPI server is running:\n"
+                "```\ncd backend\nuvicorn main:app --reload --port 8000\n```"
+            )
+            st.stop()
+        except requests.exceptions.HTTPError as e:
+            try:
+                detail = e.response.json().get("detail", str(e))
+            except Exception:
+                detail = str(e)
+            st.error(f"❌ **Backend error:** {detail}")
+            st.stop()
+        except Exception as e:
+            st.error(f"❌ **Unexpected error:** {str(e)}")
+            st.stop()
+
+    if not result.get("success"):
+        st.error(f"❌ Analysis failed: {result.get('error', 'Unknown error')}")
+        st.stop()
+
+    analysis = result.get("analysis", {})
+
+    render_analysis(analysis)
+
+# Batch results live in session_state so picking a file to drill into survives the rerun
+if st.session_state.batch_results:
+    render_batch_results(st.session_state.batch_results)
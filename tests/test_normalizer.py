@@ -0,0 +1,131 @@
+"""
+Tests for the date, money and duration normalizer.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+import os
+import sys
+import datetime
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from models import ContractAnalysis  # noqa: E402
+from normalizer import (  # noqa: E402
+    DateIndex, add_duration, normalize_analysis, parse_date, parse_duration_days, parse_money,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2024-03-15", datetime.date(2024, 3, 15)),
+    ("January 1, 2025", datetime.date(2025, 1, 1)),
+    ("Sept. 30 2024", datetime.date(2024, 9, 30)),
+    ("1st March 2024", datetime.date(2024, 3, 1)),
+    ("this 5th day of June, 2023", datetime.date(2023, 6, 5)),
+    ("01/02/2024", datetime.date(2024, 1, 2)),
+    ("25/12/2024", datetime.date(2024, 12, 25)),
+    ("effective 31.12.2025 unless renewed", datetime.date(2025, 12, 31)),
+])
+def test_parse_date(text, expected):
+    assert parse_date(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "Not specified", "February 30, 2024", "13/13/2024", "three years"])
+def test_parse_date_none(text):
+    assert parse_date(text) is None
+
+
+def test_parse_date_returns_first():
+    assert parse_date("from 2024-01-01 to 2026-12-31") == datetime.date(2024, 1, 1)
+
+
+@pytest.mark.parametrize("text, days", [
+    ("30 days", 30),
+    ("twelve (12) months", 360),
+    ("1 year", 365),
+    ("90 calendar days", 90),
+    ("10 business days", 10),
+    ("60-day notice", 60),
+    ("sixty-day notice", 60),
+    ("thirty (30)-day cure period", 30),
+    ("forty-five days", 45),
+    ("twenty four months", 720),
+    ("a one-year term", 365),
+    ("seventeen weeks", 119),
+])
+def test_parse_duration_days(text, days):
+    assert parse_duration_days(text) == days
+
+
+@pytest.mark.parametrize("text", ["", "Not specified", "upon written notice"])
+def test_parse_duration_days_none(text):
+    assert parse_duration_days(text) is None
+
+
+@pytest.mark.parametrize("text, currency, amount", [
+    ("$1,000,000", "USD", Decimal("1000000")),
+    ("USD 1.5m", "USD", Decimal("1500000")),
+    ("250,000 EUR", "EUR", Decimal("250000")),
+    ("£2 million", "GBP", Decimal("2000000")),
+    ("€1,000.50.", "EUR", Decimal("1000.50")),
+    ("INR 1,00,000", "INR", Decimal("100000")),
+    ("₹10,00,00,000", "INR", Decimal("100000000")),
+    ("INR 5 lakh", "INR", Decimal("500000")),
+    ("₹2.5 crore", "INR", Decimal("25000000")),
+])
+def test_parse_money(text, currency, amount):
+    [money] = parse_money(text)
+    assert (money.currency, money.amount) == (currency, amount)
+
+
+def test_parse_money_all_amounts_in_order():
+    amounts = parse_money("$5,000 per month, capped at USD 60,000 per year")
+    assert [m.amount for m in amounts] == [Decimal("5000"), Decimal("60000")]
+
+
+@pytest.mark.parametrize("text", ["", "12 months", "$12,34", "1,00,000"])
+def test_parse_money_skips_partial_or_uncurrenced_numbers(text):
+    assert parse_money(text) == []
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("three years from the Effective Date", datetime.date(2027, 1, 31)),
+    ("18 months", datetime.date(2025, 7, 31)),
+    ("one month", datetime.date(2024, 2, 29)),
+    ("90 days after commencement", datetime.date(2024, 4, 30)),
+    ("Not specified", None),
+])
+def test_add_duration(text, expected):
+    assert add_duration(datetime.date(2024, 1, 31), text) == expected
+
+
+def _analysis(start_date: str, end_date: str) -> ContractAnalysis:
+    return ContractAnalysis.model_validate({"contract_duration": {"start_date": start_date, "end_date": end_date}})
+
+
+def test_normalize_relative_end_date():
+    normalized = normalize_analysis(_analysis("January 1, 2025", "three (3) years from the Effective Date"))
+    assert (normalized.start_date, normalized.end_date) == (datetime.date(2025, 1, 1), datetime.date(2028, 1, 1))
+
+
+def test_normalize_end_date_prefers_explicit_date_and_ignores_notice():
+    assert normalize_analysis(_analysis("2025-01-01", "2026-06-30")).end_date == datetime.date(2026, 6, 30)
+    assert normalize_analysis(_analysis("2025-01-01", "Until terminated on 30 days notice")).end_date is None
+    assert normalize_analysis(_analysis("Not specified", "three years")).end_date is None
+
+
+def test_date_index_range_keeps_parties():
+    index = DateIndex()
+    index.add("a", datetime.date(2025, 3, 1), "Acme", "Beta")
+    index.add("b", datetime.date(2025, 1, 1), "Gamma", "Delta")
+    index.add("c", datetime.date(2025, 6, 1))
+    index.add("a", datetime.date(2025, 2, 1), "Acme", "Beta")
+    index.remove("c")
+    assert index.range(datetime.date(2025, 1, 1), datetime.date(2025, 6, 1)) == [
+        (datetime.date(2025, 1, 1), "b", "Gamma", "Delta"),
+        (datetime.date(2025, 2, 1), "a", "Acme", "Beta"),
+    ]
+    assert len(index) == 2